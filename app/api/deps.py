@@ -1,12 +1,51 @@
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.config import settings
+from app.core.cache import user_cache, token_cache
 from app.database import get_db
 from app.model.ip import ip
 from app.utils.helpers import verify_token
 
 security = HTTPBearer()
 
+_ip_columns = [attr.key for attr in inspect(ip).column_attrs]
+
+
+def decode_token_cached(token: str) -> dict | None:
+    """verify_token with a cache keyed on the JWT signature (skips repeated HMAC + JSON decode)"""
+    signature = token.rsplit(".", 1)[-1]
+    now = time.time()
+
+    cached = token_cache.get(signature)
+    # Compare the whole token so a forged header/payload can't reuse a cached signature
+    if cached is not None and cached[0] == token and cached[1].get("exp", 0) > now:
+        return cached[1]
+
+    payload = verify_token(token)
+    if payload is not None:
+        ttl = min(settings.TOKEN_CACHE_TTL_SECONDS, payload.get("exp", now) - now)
+        token_cache.set(signature, (token, payload), ttl)
+    return payload
+
+
+def _load_user(db: Session, user_id: int) -> ip | None:
+    """Fetch the partner row, serving it from the user cache when possible"""
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        user = db.query(ip).filter(ip.id == user_id).first()
+        if user is not None:
+            user_cache.set(user_id, {key: getattr(user, key) for key in _ip_columns})
+        return user
+
+    # Rebuild a per-request instance and attach it without a SELECT, so routes
+    # can still modify current_user and commit through this session
+    user = ip(**snapshot)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -15,7 +54,7 @@ def get_current_user(
     """Dependency to get current authenticated user"""
     token = credentials.credentials
     
-    payload = verify_token(token)
+    payload = decode_token_cached(token)
     if payload is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -29,7 +68,15 @@ def get_current_user(
             detail="Invalid token payload"
         )
     
-    user = db.query(ip).filter(ip.id == id).first()
+    try:
+        user_id = int(id)
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload"
+        )
+    
+    user = _load_user(db, user_id)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
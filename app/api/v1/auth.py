@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
 from datetime import datetime
 from app.database import get_db
 from app.model.ip import ip
+from app.model.otp_outbox import OtpOutbox
 
 from app.schemas.ip import (
     UserRegistration, 
@@ -11,9 +12,13 @@ from app.schemas.ip import (
     UserResponse,
     TokenResponse
 )
+from app.schemas.otp_outbox import OTPDispatchStatus
 from app.services.otp_service import OTPService
 from app.utils.helpers import create_access_token
 from app.api.deps import get_current_user
+from app.core.cache import invalidate_user
+from app.core.rate_limit import enforce_otp_rate_limits
+from app.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -48,29 +53,38 @@ def register_user(user_data: UserRegistration, db: Session = Depends(get_db)):
     return new_user
 
 
-@router.post("/login")
-def login(login_data: LoginRequest, db: Session = Depends(get_db)):
-    """Login user and send OTP"""
-    
-    # Normalize phone_number number
-    phone_number = login_data.phone_number
+def _normalize_phone(phone_number: str) -> str:
     if not phone_number.startswith('91') and len(phone_number) == 10:
         phone_number = '91' + phone_number
-    
-    # Check if user exists
-    user = db.query(ip).filter(ip.phone_number == phone_number).first()
+    return phone_number
+
+
+def _get_user_by_phone(db: Session, phone_number: str, detail: str, for_update: bool = False) -> ip:
+    """The one ip lookup per auth request; locked when the request updates the row"""
+    query = db.query(ip).filter(ip.phone_number == phone_number)
+    if for_update:
+        query = query.with_for_update()
+    user = query.first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found. Please register first."
+            detail=detail
         )
-    
-    # Generate and send OTP
-    # Extract first name from phone number or use default
-    first_name = user.first_name.split()[0] if user.phone_number else "User"
+    return user
 
-    # otp_result = OTPService.send_otp(phone_number, first_name)
-    otp_result = OTPService.send_otp(db, phone_number, first_name)
+
+@router.post("/login")
+def login(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
+    """Login user and send OTP"""
+    
+    phone_number = _normalize_phone(login_data.phone_number)
+    
+    enforce_otp_rate_limits(request, "send", phone_number, settings.RATE_LIMIT_OTP_SEND_PER_PHONE)
+    
+    user = _get_user_by_phone(db, phone_number, "User not found. Please register first.")
+    
+    # Generate OTP and queue the SMS (single commit: the OTP and the outbox row)
+    otp_result = OTPService.send_otp(db, user)
 
     if not otp_result["success"]:
         raise HTTPException(
@@ -80,31 +94,24 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     
     return {
         "message": "OTP sent successfully to your phone_number",
-        "phone_number": phone_number
+        "phone_number": phone_number,
+        "dispatch_id": otp_result["dispatch_id"]
     }
 
 
 @router.post("/verify-otp", response_model=TokenResponse)
-def verify_otp(otp_data: OTPVerification, db: Session = Depends(get_db)):
+def verify_otp(otp_data: OTPVerification, request: Request, db: Session = Depends(get_db)):
     """Verify OTP and authenticate user"""
     
-    # Normalize phone_number number
-    phone_number = otp_data.phone_number
-    if not phone_number.startswith('91') and len(phone_number) == 10:
-        phone_number = '91' + phone_number
+    phone_number = _normalize_phone(otp_data.phone_number)
     
-    # Check if user exists
-    user = db.query(ip).filter(ip.phone_number == phone_number).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+    enforce_otp_rate_limits(request, "verify", phone_number, settings.RATE_LIMIT_OTP_VERIFY_PER_PHONE)
     
-    # Verify OTP
-    is_valid = OTPService.verify_otp(db, phone_number, otp_data.otp)
+    # Locked so a concurrent logout/verification update can't interleave
+    user = _get_user_by_phone(db, phone_number, "User not found", for_update=True)
     
-    if not is_valid:
+    if not OTPService.verify_otp(db, user, otp_data.otp):
+        db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid or expired OTP"
@@ -113,39 +120,33 @@ def verify_otp(otp_data: OTPVerification, db: Session = Depends(get_db)):
     # Update user verification status
     user.is_verified = True
     user.verified_at = datetime.utcnow()
+    # Serialize before commit so the response needs no reload of the expired row
+    user_data = UserResponse.model_validate(user)
+    user_id = user.id
     db.commit()
-    db.refresh(user)
+    invalidate_user(user_id)
     
     # Generate access token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    access_token = create_access_token(data={"sub": str(user_id)})
     
     return {
         "access_token": access_token,
         "token_type": "bearer",
-        "user": user
+        "user": user_data
     }
 
 
 @router.post("/resend-otp")
-def resend_otp(login_data: LoginRequest, db: Session = Depends(get_db)):
+def resend_otp(login_data: LoginRequest, request: Request, db: Session = Depends(get_db)):
     """Resend OTP to user"""
     
-    # Normalize phone_number number
-    phone_number = login_data.phone_number
-    if not phone_number.startswith('91') and len(phone_number) == 10:
-        phone_number = '91' + phone_number
+    phone_number = _normalize_phone(login_data.phone_number)
     
-    # Check if user exists
-    user = db.query(ip).filter(ip.phone_number == phone_number).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
+    enforce_otp_rate_limits(request, "send", phone_number, settings.RATE_LIMIT_OTP_SEND_PER_PHONE)
     
-    # Generate and send OTP
-    first_name = user.first_name.split()[0] if user.phone_number else "User"
-    otp_result = OTPService.send_otp(phone_number, first_name)
+    user = _get_user_by_phone(db, phone_number, "User not found")
+    
+    otp_result = OTPService.send_otp(db, user)
     
     if not otp_result["success"]:
         raise HTTPException(
@@ -155,10 +156,32 @@ def resend_otp(login_data: LoginRequest, db: Session = Depends(get_db)):
     
     return {
         "message": "OTP resent successfully",
-        "phone_number": phone_number
+        "phone_number": phone_number,
+        "dispatch_id": otp_result["dispatch_id"]
     }
 
 
+@router.get("/otp-status/{dispatch_id}", response_model=OTPDispatchStatus)
+def get_otp_status(dispatch_id: str, db: Session = Depends(get_db)):
+    """Delivery status of a queued OTP SMS (pending / sending / sent / failed / superseded)"""
+    # dispatch_id is the unguessable token returned by login / resend-otp, not the row id
+    dispatch = db.query(OtpOutbox).filter(OtpOutbox.dispatch_token == dispatch_id).first()
+    if not dispatch:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="OTP dispatch not found"
+        )
+    
+    return OTPDispatchStatus(
+        dispatch_id=dispatch.dispatch_token,
+        status=dispatch.status,
+        attempts=dispatch.attempts,
+        last_error=dispatch.last_error,
+        created_at=dispatch.created_at,
+        sent_at=dispatch.sent_at
+    )
+
+
 @router.post("/logout")
 def logout(
     current_user: ip = Depends(get_current_user),
@@ -169,6 +192,7 @@ def logout(
     #current_user.last_logout_at = datetime.utcnow()
     current_user.is_verified = False
     db.commit()
+    invalidate_user(current_user.id)
     
     return {
         "message": f"User with phone_number {current_user.phone_number} logged out successfully.",
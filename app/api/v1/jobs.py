@@ -1,22 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlalchemy.orm import Session
-from app.database import get_db
+import asyncio
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
 from app.model.ip import ip
 from app.model.job import Job
+from app.model.job_status_log import JobStatusLog
 from app.api.deps import get_verified_user
-from app.services.s3_service import upload_file_to_s3
+from app.services.s3_service import (
+    upload_stream_to_s3, generate_presigned_upload, get_presigned_download_urls, get_file_url,
+    head_s3_object, delete_s3_objects
+)
+from app.crud.aio import add_job_attachments, list_job_attachments, record_job_attachment
+from app.crud.job_attachment import encode_attachment_cursor
+from app.schemas.job_attachment import JobAttachmentPage, PresignedUploadConfirm
+from app.crud.rollup import move_job_in_rollup, job_rollup_key, job_payout
+from app.core.events import job_events, job_change
 
 router = APIRouter(prefix="/dashboard/jobs", tags=["Dashboard"])
 
 
+def _upload_prefix(job_id: int) -> str:
+    """S3 key prefix for presigned uploads, so a confirmed key is known to belong to the job"""
+    return f"jobs/{job_id}/"
+
+
 # ✅ Get all jobs (only if verified)
 @router.get("")
-def get_all_jobs(
+async def get_all_jobs(
     current_user: ip = Depends(get_verified_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # jobs = db.query(Job).all()
-    jobs = db.query(Job).filter(Job.assigned_ip_id == current_user.id).all()
+    result = await db.execute(select(Job).where(Job.assigned_ip_id == current_user.id))
+    jobs = result.scalars().all()
     print("Jobs fetched:", jobs)
 
     return {
@@ -28,12 +47,12 @@ def get_all_jobs(
 
 # ✅ Get single job by ID
 @router.get("/{job_id}")
-def get_single_job(
+async def get_single_job(
     job_id: int,
     current_user: ip = Depends(get_verified_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
 
     if not job:
         raise HTTPException(
@@ -52,11 +71,12 @@ def get_single_job(
 @router.post("/{job_id}/upload")
 async def upload_progress_update(
     job_id: int,
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    files: Optional[List[UploadFile]] = File(None),
     current_user: ip = Depends(get_verified_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    job = db.query(Job).filter(Job.id == job_id).first()
+    job = await db.get(Job, job_id)
 
     if not job:
         raise HTTPException(
@@ -64,31 +84,151 @@ async def upload_progress_update(
             detail="Job not found"
         )
 
-    # Read file content
-    file_content = await file.read()
-    file_url = upload_file_to_s3(
-        file_content=file_content,
-        filename=file.filename,
-        content_type=file.content_type
+    uploads = ([file] if file else []) + (files or [])
+    if not uploads:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No file provided"
+        )
+
+    # Stream to S3 in parts, off the event loop (files in parallel, bounded by the S3 limiter)
+    results = await asyncio.gather(
+        *(upload_stream_to_s3(upload) for upload in uploads), return_exceptions=True
     )
+    uploaded = [result for result in results if not isinstance(result, BaseException)]
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        # All or nothing: don't leave the files that did finish orphaned in the bucket
+        await delete_s3_objects([result["key"] for result in uploaded])
+        raise failed[0]
+    for upload, result in zip(uploads, uploaded):
+        result["filename"] = upload.filename
+        result["content_type"] = upload.content_type
+
+    # One batched INSERT for every file in the request
+    try:
+        await add_job_attachments(db, job_id, uploaded, uploaded_by_ip_id=current_user.id)
+    except Exception:
+        await delete_s3_objects([result["key"] for result in uploaded])
+        raise
+
+    return {
+        "message": "File uploaded successfully",
+        "file_url": uploaded[0]["file_url"],
+        "files": [
+            {"filename": result["filename"], "file_url": result["file_url"], "size": result["size"]}
+            for result in uploaded
+        ]
+    }
+
+
+# ✅ Job photo gallery (metadata from DB, presigned GET URLs in one batch)
+@router.get("/{job_id}/attachments", response_model=JobAttachmentPage)
+async def get_job_attachments(
+    job_id: int,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: ip = Depends(get_verified_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = await db.get(Job, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    attachments = await list_job_attachments(db, job_id, cursor=cursor, limit=limit)
+    download_urls = get_presigned_download_urls(attachment["s3_key"] for attachment in attachments)
+    for attachment in attachments:
+        attachment["download_url"] = download_urls[attachment["s3_key"]]
+
+    return {
+        "job_id": job_id,
+        "attachments": attachments,
+        "next_cursor": encode_attachment_cursor(attachments[-1]) if len(attachments) == limit else None
+    }
+
+
+# ✅ Presigned direct-to-S3 upload (client PUTs the file itself)
+@router.post("/{job_id}/upload-url")
+async def get_progress_upload_url(
+    job_id: int,
+    filename: str = Query(..., min_length=1, max_length=255),
+    content_type: str = Query("application/octet-stream"),
+    current_user: ip = Depends(get_verified_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = await db.get(Job, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    return {
+        "message": "Upload URL generated successfully",
+        **generate_presigned_upload(filename, content_type, prefix=_upload_prefix(job_id))
+    }
+
+
+# ✅ Record a presigned upload once the client's PUT has finished
+@router.post("/{job_id}/upload-confirm")
+async def confirm_progress_upload(
+    job_id: int,
+    upload: PresignedUploadConfirm,
+    current_user: ip = Depends(get_verified_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = await db.get(Job, job_id)
+
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+
+    # Only keys handed out by /upload-url for this job can be attached to it
+    if not upload.key.startswith(_upload_prefix(job_id)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Key was not issued for this job"
+        )
+
+    head = await head_s3_object(upload.key)
+    if head is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Uploaded file not found"
+        )
 
-    # Save the uploaded file link to DB later (if you have a table)
-    # job.progress_images.append(file_url) — later phase
+    # Confirm is safe to retry (even concurrently): the attachment is recorded once
+    attachment = await record_job_attachment(db, job_id, {
+        "key": upload.key,
+        "file_url": get_file_url(upload.key),
+        "filename": upload.filename or upload.key.rsplit("/", 1)[-1].split("_", 1)[-1],
+        **head
+    }, uploaded_by_ip_id=current_user.id)
 
     return {
         "message": "File uploaded successfully",
-        "file_url": file_url
+        "attachment_id": attachment["id"],
+        "file_url": attachment["file_url"],
+        "size": attachment["size"]
     }
 
 
 # ✅ Complete job
 @router.get("/{job_id}/completed")
-def complete_job(
+async def complete_job(
     job_id: int,
     current_user: ip = Depends(get_verified_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    job = db.query(Job).filter(Job.id == job_id).first()
+    # Locked so a concurrent start/pause can't move the job between rollup buckets under us
+    job = await db.get(Job, job_id, with_for_update=True)
 
     if not job:
         raise HTTPException(
@@ -96,9 +236,19 @@ def complete_job(
             detail="Job not found"
         )
 
+    old_rollup_key = job_rollup_key(job)
+    previous_status = job.status
     job.status = "completed"
-    db.commit()
-    db.refresh(job)
+    await db.run_sync(move_job_in_rollup, old_rollup_key, job_payout(job), job)
+    db.add(JobStatusLog(
+        job_id=job.id,
+        status="completed",
+        timestamp=datetime.utcnow(),
+        notes="Job completed by partner"
+    ))
+    await db.commit()
+    await db.refresh(job)
+    job_events.publish("complete", [job_change(job, previous_status)])
 
     return {
         "message": "Job marked as completed",
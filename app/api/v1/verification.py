@@ -1,8 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.model.ip import ip
-from app.model.job import Job
+from app.crud.job import get_job_feed_page, iter_job_feed_pages
 
 from app.schemas.ip import (
     PANVerification, 
@@ -12,12 +17,20 @@ from app.schemas.ip import (
 from app.services.pan_service import PANService
 from app.services.bank_service import BankService
 from app.api.deps import get_verified_user
+from app.core.cache import invalidate_user
 
 router = APIRouter(prefix="/verification", tags=["Verification"])
 
 
+def _save_user(db: Session, user: ip):
+    """Commit verification results (runs in the threadpool; the session is sync)"""
+    db.commit()
+    invalidate_user(user.id)
+    db.refresh(user)
+
+
 @router.post("/pan")
-def verify_pan(
+async def verify_pan(
     pan_data: PANVerification,
     current_user: ip = Depends(get_verified_user),
     db: Session = Depends(get_db)
@@ -32,7 +45,7 @@ def verify_pan(
         )
     
     # Verify PAN using external API
-    result = PANService.verify_pan(pan_data.pan)
+    result = await PANService.verify_pan(pan_data.pan)
     
     if not result["verified"]:
         raise HTTPException(
@@ -45,8 +58,7 @@ def verify_pan(
     current_user.pan_number = result["pan_number"]
     current_user.pan_name = result.get("name")
     
-    db.commit()
-    db.refresh(current_user)
+    await run_in_threadpool(_save_user, db, current_user)
     
     return {
         "message": "PAN verified successfully",
@@ -56,7 +68,7 @@ def verify_pan(
 
 
 @router.post("/bank")
-def verify_bank(
+async def verify_bank(
     bank_data: BankVerification,
     current_user: ip = Depends(get_verified_user),
     db: Session = Depends(get_db)
@@ -71,7 +83,7 @@ def verify_bank(
         )
     
     # Verify bank account using external API
-    result = BankService.verify_bank_account(
+    result = await BankService.verify_bank_account(
         bank_data.account_number,
         bank_data.ifsc,
         bank_data.fetch_ifsc
@@ -89,8 +101,7 @@ def verify_bank(
     current_user.ifsc_code = result["ifsc_code"]
     current_user.account_holder_name = result.get("account_holder_name")
     
-    db.commit()
-    db.refresh(current_user)
+    await run_in_threadpool(_save_user, db, current_user)
     
     return {
         "message": "Bank account verified successfully",
@@ -137,12 +148,33 @@ def get_verification_status(
 #     }
 
 
+def _stream_job_feed():
+    """Stream the whole job feed as JSON using its own session (outlives the request scope)"""
+    db = SessionLocal()
+    try:
+        yield '{"has_full_access": true, "message": "All verifications complete", "jobs": ['
+        separator = ""
+        for page in iter_job_feed_pages(db):
+            # One chunk per page keeps the per-chunk threadpool hop off the per-row path
+            yield separator + ",".join(json.dumps(job) for job in jsonable_encoder(page))
+            separator = ","
+        yield "]}"
+    finally:
+        db.close()
+
+
 @router.get("/panel-access")
 def check_panel_access(
+    after_id: Optional[int] = Query(None, description="Cursor: return jobs with id greater than this (next_cursor of the previous page)"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size (100 when only after_id is given)"),
+    stream: bool = Query(False, description="Stream every job as one JSON document (the default without after_id/limit)"),
     current_user: ip = Depends(get_verified_user),
     db: Session = Depends(get_db)
 ):
-    """Check if user has completed all verifications"""
+    """
+    Check if user has completed all verifications. Verified users get every job, as
+    before; pass limit (and after_id = next_cursor) to page through them instead.
+    """
 
     all_verified = (
         current_user.is_verified and
@@ -152,36 +184,19 @@ def check_panel_access(
 
     # ✅ If verified, fetch job data
     if all_verified:
-        # jobs = db.query(Job).filter(Job.assigned_ip_id == current_user.id).all()
-        jobs = db.query(Job).all()
-        # print("Current user ID:", current_user.id)
-        # print("assigned ip for the  jobs:", [job.assigned_ip_id for job in jobs])
-        # print("Jobs assigned to user:", jobs)
-
-        # Convert SQLAlchemy objects → dict
-        job_data = [
-            {
-                "id": job.id,
-                "name": job.name,
-                "customer_name": job.customer_name,
-                "address": job.address,
-                "city": job.city,
-                "status": job.status,
-                "pincode": job.pincode,
-                "assigned_ip_id": job.assigned_ip_id,
-                "type": job.type,
-                "rate": job.rate,
-                "size": job.size,
-                "delivery_date": job.delivery_date,
-                "checklist_link": job.checklist_link
-            }
-            for job in jobs
-        ]
+        # Existing clients send no paging params and expect the whole feed
+        if stream or (after_id is None and limit is None):
+            return StreamingResponse(_stream_job_feed(), media_type="application/json")
+
+        # Keyset page over only the serialized columns
+        limit = limit or 100
+        job_data = get_job_feed_page(db, after_id=after_id, limit=limit)
 
         return {
             "has_full_access": True,
             "message": "All verifications complete",
-            "jobs": job_data
+            "jobs": job_data,
+            "next_cursor": job_data[-1]["id"] if len(job_data) == limit else None
         }
 
     # ❌ If not verified, return verification status
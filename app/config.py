@@ -9,8 +9,19 @@ class Settings(BaseSettings):
     DB_USER: str
     DB_PASS: str
     DATABASE_URL: str
+    # Optional override for the asyncio engine (defaults to DATABASE_URL with an async driver)
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Connection pool (per engine, per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30       # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800     # seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
 
     PROJECT_NAME: str = "Modula Admin Dashboard"
+    # Adds X-DB-* query stat headers to responses
+    DEBUG: bool = False
     DATABASE_URL: str|None=None
     SECRET_KEY: str|None=None
     ALGORITHM: str = "HS256"
@@ -36,12 +47,108 @@ class Settings(BaseSettings):
     
     # Attestr API
     ATTESTR_API_KEY: str
+    ATTESTR_BASE_URL: str = "https://api.attestr.com"
+    
+    # Verification result cache (Attestr). Positive results change rarely;
+    # negative ones are kept briefly so a corrected retry is not blocked for long
+    VERIFICATION_CACHE_POSITIVE_TTL_SECONDS: int = 60 * 60 * 24 * 30
+    VERIFICATION_CACHE_NEGATIVE_TTL_SECONDS: int = 60 * 15
+    VERIFICATION_CACHE_MAX_SIZE: int = 10000
+    IFSC_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 7
+    
+    # Redis (optional shared cache tier)
+    REDIS_URL: str | None = None
+    
+    # Outbound HTTP client (shared, pooled per upstream host)
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_READ_TIMEOUT: float = 30.0
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 50
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 30.0
+
+    # Outbound provider resilience (Attestr, RML SMS): bulkhead, circuit breaker, retries
+    ATTESTR_MAX_CONCURRENCY: int = 20
+    ATTESTR_DEADLINE_SECONDS: float = 20.0
+    SMS_MAX_CONCURRENCY: int = 10
+    SMS_DEADLINE_SECONDS: float = 15.0
+    PROVIDER_RETRY_MAX_ATTEMPTS: int = 3
+    PROVIDER_RETRY_BACKOFF_SECONDS: float = 0.2
+    PROVIDER_BREAKER_FAILURE_THRESHOLD: int = 5
+    PROVIDER_BREAKER_RESET_SECONDS: float = 30.0
+
+    
+    
+    # Auth caches (partner lookup in get_current_user, decoded JWTs)
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    TOKEN_CACHE_MAX_SIZE: int = 10000
     
+    # Bulk job import / transitions: rows per insert batch (and per CSV commit), max rows per request
+    BULK_JOB_BATCH_SIZE: int = 1000
+    BULK_JOB_MAX_ROWS: int = 5000
     
+    # Job status event stream (/jobs/events, /jobs/ws): per-client queue before a slow
+    # client is dropped, events kept for reconnect replay, connection cap, SSE keepalive
+    JOB_EVENTS_QUEUE_SIZE: int = 256
+    JOB_EVENTS_REPLAY_SIZE: int = 1000
+    JOB_EVENTS_MAX_SUBSCRIBERS: int = 5000
+    JOB_EVENTS_HEARTBEAT_SECONDS: float = 15.0
+    
+    # Job status log archival: age at which rows move to the archive table, rows per
+    # archive transaction, batches per archive call
+    STATUS_LOG_ARCHIVE_AFTER_DAYS: int = 90
+    STATUS_LOG_ARCHIVE_BATCH_SIZE: int = 5000
+    STATUS_LOG_ARCHIVE_MAX_BATCHES: int = 20
+    
+    # Job duration analytics: log ids re-checked below the last processed one (ids from
+    # concurrent transactions can commit out of order), jobs per windowed recompute, and
+    # seconds between background refreshes (0 = off; use POST /analytics/job-durations/refresh)
+    JOB_DURATION_REFRESH_LOOKBACK_IDS: int = 1000
+    JOB_DURATION_REFRESH_BATCH_SIZE: int = 500
+    JOB_DURATION_REFRESH_INTERVAL_SECONDS: float = 60
+    
+    # Analytics response cache (payout / job-stages / ip-performance); entries are also
+    # invalidated by job writes, the TTL only bounds staleness of IP names. 0 disables.
+    ANALYTICS_CACHE_TTL_SECONDS: int = 300
+    ANALYTICS_CACHE_MAX_SIZE: int = 1000
+    
+    # Readiness probe (/health/ready): DB/Redis probe cache and timeout, minimum free
+    # pool fraction, and extra dependencies to require (attestr, rml_sms, redis)
+    HEALTH_DB_PROBE_TTL_SECONDS: float = 2.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 1.0
+    HEALTH_MIN_POOL_HEADROOM: float = 0.1
+    HEALTH_READY_DEPENDENCIES: list[str] = []
+    
+    # Per-request SQL stats: repeats of one statement that count as a likely N+1,
+    # and statement budgets per route ("METHOD /path/template": max statements)
+    QUERY_N_PLUS_ONE_THRESHOLD: int = 5
+    QUERY_BUDGETS: dict[str, int] = {
+        "POST /api/v1/auth/login": 4,
+        "POST /api/v1/auth/resend-otp": 4,
+        "POST /api/v1/auth/verify-otp": 3,
+    }
     
     # OTP Settings
     OTP_EXPIRY_MINUTES: int = 10
     OTP_LENGTH: int = 6
+    # database / redis / memory / auto (redis when REDIS_URL is set, else database).
+    # memory is per-process: single-worker development only
+    OTP_STORE_BACKEND: str = "auto"
+    OTP_STORE_MAX_SIZE: int = 100000
+
+    # Sliding-window rate limits on OTP endpoints (per window)
+    RATE_LIMIT_WINDOW_SECONDS: int = 60 * 15
+    RATE_LIMIT_OTP_SEND_PER_PHONE: int = 5       # login + resend-otp
+    RATE_LIMIT_OTP_VERIFY_PER_PHONE: int = 10
+    RATE_LIMIT_OTP_PER_CLIENT: int = 50          # per client IP, per action
+
+    # Background OTP SMS dispatch (otp_outbox table + worker pool)
+    OTP_DISPATCH_WORKERS: int = 4
+    OTP_DISPATCH_MAX_ATTEMPTS: int = 5
+    OTP_DISPATCH_POLL_SECONDS: float = 5.0
+    OTP_DISPATCH_LEASE_SECONDS: float = 60.0    # a send not finished by then is retried
+    OTP_DISPATCH_RETRY_BACKOFF_SECONDS: float = 2.0
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.redis_client import get_redis
+
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after a TTL"""
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl_seconds: float = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Async two-tier cache: in-process TTLCache in front of an optional Redis tier
+    (shared across workers). Values must be JSON-serializable. Redis errors are
+    logged and treated as misses - the cache never fails a request.
+    """
+
+    def __init__(self, namespace: str, max_size: int, ttl_seconds: float):
+        self.namespace = namespace
+        self.local = TTLCache(max_size, ttl_seconds)
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str):
+        value = self.local.get(key)
+        if value is not None:
+            return value
+
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.get(self._redis_key(key))
+                pipe.ttl(self._redis_key(key))
+                raw, ttl = await pipe.execute()
+        except Exception as e:
+            print(f"❌ Redis get failed for {self.namespace}:", str(e))
+            return None
+        if raw is None:
+            return None
+
+        value = json.loads(raw)
+        if ttl > 0:
+            self.local.set(key, value, ttl)
+        return value
+
+    async def set(self, key: str, value, ttl_seconds: float = None):
+        ttl = self.local.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self.local.set(key, value, ttl)
+
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            await client.set(self._redis_key(key), json.dumps(value, default=str), ex=int(ttl))
+        except Exception as e:
+            print(f"❌ Redis set failed for {self.namespace}:", str(e))
+
+
+# Authenticated partner (ip) rows by id, stored as column snapshots.
+# Invalidated in-process on writes; other workers converge within the TTL.
+user_cache = TTLCache(settings.USER_CACHE_MAX_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+# Decoded JWT payloads keyed on the token signature
+token_cache = TTLCache(settings.TOKEN_CACHE_MAX_SIZE, settings.TOKEN_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int):
+    """Drop a cached partner after its verification flags or assignment change"""
+    if user_id is not None:
+        user_cache.delete(int(user_id))
+
+
+def invalidate_user_on_commit(db: Session, user_id: int):
+    """
+    Drop a cached partner once this session's transaction commits - for writes whose
+    caller commits later, so a read in between can't re-cache the old row
+    """
+    if user_id is not None:
+        db.info.setdefault("invalidate_users", set()).add(int(user_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_users_after_commit(session):
+    for user_id in session.info.pop("invalidate_users", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_user_invalidations(session):
+    session.info.pop("invalidate_users", None)
@@ -0,0 +1,87 @@
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from app.config import settings
+from app.core.metrics import Histogram, Counter, registry, histogram_samples
+
+# Pool name -> pool instance, for the stats endpoint
+_pools = {}
+
+
+class _InstrumentedPoolMixin:
+    """Times every connection checkout (including the wait for a free slot)"""
+
+    pool_name = "default"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Registering here also covers pools recreated by Engine.dispose()
+        self.checkout_wait = Histogram()
+        self.checkout_timeouts = Counter()
+        _pools[self.pool_name] = self
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_timeouts.inc()
+            raise
+        finally:
+            self.checkout_wait.observe(time.perf_counter() - start)
+
+
+def instrumented_pool_class(base, name: str):
+    return type(f"Instrumented{base.__name__}", (_InstrumentedPoolMixin, base), {"pool_name": name})
+
+
+def engine_pool_options(name: str, is_async: bool = False) -> dict:
+    """create_engine / create_async_engine kwargs for a pool sized from Settings"""
+    return {
+        "poolclass": instrumented_pool_class(AsyncAdaptedQueuePool if is_async else QueuePool, name),
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def pool_stats() -> dict:
+    """Point-in-time view of every instrumented pool"""
+    stats = {}
+    for name, pool in _pools.items():
+        stats[name] = {
+            "size": pool.size(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkout_timeouts": pool.checkout_timeouts.value,
+            "checkout_wait_seconds": pool.checkout_wait.snapshot(),
+        }
+    return stats
+
+
+def _collect_pool_metrics() -> list:
+    gauges = {
+        "db_pool_size": ("Configured pool size", lambda pool: pool.size()),
+        "db_pool_checked_out": ("Connections currently checked out", lambda pool: pool.checkedout()),
+        "db_pool_overflow": ("Overflow connections in use", lambda pool: max(pool.overflow(), 0)),
+    }
+    families = [
+        (name, "gauge", documentation, [(name, {"pool": pool_name}, value(pool)) for pool_name, pool in _pools.items()])
+        for name, (documentation, value) in gauges.items()
+    ]
+    families.append((
+        "db_pool_checkout_timeouts_total", "counter", "Checkouts that gave up waiting for a connection",
+        [("db_pool_checkout_timeouts_total", {"pool": name}, pool.checkout_timeouts.value) for name, pool in _pools.items()]
+    ))
+    wait_samples = []
+    for name, pool in _pools.items():
+        wait_samples.extend(histogram_samples("db_pool_checkout_wait_seconds", {"pool": name}, pool.checkout_wait.snapshot()))
+    families.append(("db_pool_checkout_wait_seconds", "histogram", "Time spent waiting for a pooled connection", wait_samples))
+    return families
+
+
+registry.register_collector(_collect_pool_metrics)
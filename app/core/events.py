@@ -0,0 +1,192 @@
+"""
+In-process pub/sub for job status changes (GET /jobs/events, WS /jobs/ws).
+
+CRUD code publishes after its transaction commits, from whatever thread it runs
+in. Each event is serialized once; delivery to subscribers is one
+call_soon_threadsafe per event loop (not per subscriber), which then fills every
+subscriber queue on that loop with the same pre-encoded payload, so fan-out to
+thousands of open streams is a list walk.
+
+Queues are bounded: a subscriber that falls JOB_EVENTS_QUEUE_SIZE events behind
+is dropped and told to resync, instead of growing memory without limit. The last
+JOB_EVENTS_REPLAY_SIZE events are kept so a reconnecting client (SSE
+Last-Event-ID) can catch up without re-reading the jobs table.
+
+Event ids are "<epoch>-<sequence>": the epoch is random per process start, so an
+id handed out by another worker or before a restart is never mistaken for one of
+ours - replaying it asks the client to resync instead.
+
+Events only reach clients connected to the process that made the change; with
+several workers, each dashboard sees the writes handled by its own worker.
+"""
+import asyncio
+import json
+import secrets
+import threading
+from collections import deque
+from datetime import datetime
+from itertools import count
+from app.config import settings
+from app.core.metrics import registry
+
+
+class JobEvent:
+    __slots__ = ("id", "seq", "data")
+
+    def __init__(self, event_id: str, seq: int, data: str):
+        self.id = event_id
+        self.seq = seq
+        self.data = data
+
+    @property
+    def sse(self) -> str:
+        return f"id: {self.id}\nevent: job.status\ndata: {self.data}\n\n"
+
+
+class Subscription:
+    """One connected client; `get()` waits for the next event (None once dropped)"""
+
+    def __init__(self, bus, loop, max_queue: int):
+        self.bus = bus
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = False
+
+    def deliver(self, event: JobEvent):
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Too slow to keep up: cut it loose rather than buffer without bound
+            self.dropped = True
+            self.bus.unsubscribe(self)
+            job_events_dropped.inc()
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+    async def get(self, timeout: float = None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class JobEventBus:
+
+    def __init__(self, max_queue: int, replay_size: int, max_subscribers: int):
+        self.max_queue = max_queue
+        self.max_subscribers = max_subscribers
+        self.epoch = secrets.token_hex(4)
+        self._ids = count(1)
+        self._last_seq = 0
+        self._recent = deque(maxlen=replay_size)
+        self._loops = {}  # loop -> set of subscriptions on that loop
+        self._lock = threading.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._loops.values())
+
+    def subscribe(self) -> Subscription | None:
+        """Register a subscriber on the running loop; None when at max_subscribers"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if sum(len(subs) for subs in self._loops.values()) >= self.max_subscribers:
+                return None
+            sub = Subscription(self, loop, self.max_queue)
+            self._loops.setdefault(loop, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._loops.get(sub.loop)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._loops[sub.loop]
+
+    def _sequence(self, event_id: str) -> int | None:
+        """Sequence number of an id issued by this bus, None for any other id"""
+        epoch, _, seq = str(event_id).partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def replay(self, after_id: str) -> list | None:
+        """
+        Buffered events newer than after_id, or None (resync) if some were already
+        evicted or the id wasn't issued by this process since it started
+        """
+        seq = self._sequence(after_id)
+        with self._lock:
+            recent = list(self._recent)
+            last_seq = self._last_seq
+        if seq is None or seq > last_seq:
+            return None
+        if recent and recent[0].seq > seq + 1:
+            return None
+        return [event for event in recent if event.seq > seq]
+
+    def publish(self, source: str, changes: list):
+        """
+        changes: [{"job_id", "status", "previous_status", "ip_id"}, ...]. Call only
+        after the change is committed; safe from any thread.
+        """
+        if not changes:
+            return
+        with self._lock:
+            seq = self._last_seq = next(self._ids)
+            event_id = f"{self.epoch}-{seq}"
+            payload = {
+                "id": event_id,
+                "type": "job.status",
+                "source": source,
+                "timestamp": datetime.utcnow().isoformat(),
+                "changes": changes,
+            }
+            event = JobEvent(event_id, seq, json.dumps(payload, default=str))
+            self._recent.append(event)
+            targets = [(loop, tuple(subs)) for loop, subs in self._loops.items()]
+        job_events_published.inc()
+
+        for loop, subs in targets:
+            try:
+                loop.call_soon_threadsafe(_fan_out, subs, event)
+            except RuntimeError:
+                # Loop already closed (shutdown); nothing left to deliver to
+                pass
+
+
+def _fan_out(subs: tuple, event: JobEvent):
+    for sub in subs:
+        sub.deliver(event)
+
+
+def job_change(db_job, previous_status: str | None) -> dict:
+    return {
+        "job_id": db_job.id,
+        "status": db_job.status,
+        "previous_status": previous_status,
+        "ip_id": db_job.assigned_ip_id,
+    }
+
+
+job_events = JobEventBus(
+    max_queue=settings.JOB_EVENTS_QUEUE_SIZE,
+    replay_size=settings.JOB_EVENTS_REPLAY_SIZE,
+    max_subscribers=settings.JOB_EVENTS_MAX_SUBSCRIBERS,
+)
+
+job_events_published = registry.counter("job_events_published_total", "Job status events published").labels()
+job_events_dropped = registry.counter(
+    "job_events_dropped_subscribers_total", "Event stream subscribers dropped for falling behind"
+).labels()
+
+
+def _collect_subscribers() -> list:
+    return [(
+        "job_events_subscribers", "gauge", "Clients connected to the job event stream",
+        [("job_events_subscribers", {}, job_events.subscriber_count)]
+    )]
+
+
+registry.register_collector(_collect_subscribers)
@@ -0,0 +1,101 @@
+"""
+Readiness checks for GET /health/ready.
+
+Probes that touch the network (DB, Redis) are cached for a short TTL and
+single-flight, so a load balancer polling every pod frequently costs at most
+one probe per TTL per process, and a slow dependency can't pile probes up.
+"""
+import asyncio
+import time
+from sqlalchemy import text
+from app.config import settings
+from app.core.db_pool import pool_stats
+from app.core.redis_client import get_redis
+from app.database import async_engine
+from app.services.resilience import PROVIDERS, CircuitBreaker
+
+
+class CachedProbe:
+    """Runs an async probe at most once per `ttl_seconds`; concurrent callers share it"""
+
+    def __init__(self, probe, ttl_seconds: float):
+        self.probe = probe
+        self.ttl_seconds = ttl_seconds
+        self._result = None
+        self._checked_at = 0.0
+        self._lock = None
+
+    async def check(self) -> dict:
+        if self._result is not None and time.monotonic() - self._checked_at < self.ttl_seconds:
+            return {**self._result, "cached": True}
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            # Another caller may have refreshed it while we waited
+            if self._result is not None and time.monotonic() - self._checked_at < self.ttl_seconds:
+                return {**self._result, "cached": True}
+            self._result = await self._timed()
+            self._checked_at = time.monotonic()
+            return {**self._result, "cached": False}
+
+    async def _timed(self) -> dict:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.probe(), timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS)
+            result = {"status": "ok"}
+        except asyncio.TimeoutError:
+            result = {"status": "degraded", "error": f"no response within {settings.HEALTH_PROBE_TIMEOUT_SECONDS}s"}
+        except Exception as e:
+            result = {"status": "degraded", "error": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return result
+
+
+async def _ping_database():
+    # Goes through the pool, so an exhausted pool shows up as a timeout here
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _ping_redis():
+    client = get_redis()
+    if client is None:
+        raise RuntimeError("REDIS_URL is not configured")
+    await client.ping()
+
+
+database_probe = CachedProbe(_ping_database, settings.HEALTH_DB_PROBE_TTL_SECONDS)
+redis_probe = CachedProbe(_ping_redis, settings.HEALTH_DB_PROBE_TTL_SECONDS)
+
+
+def check_pool_headroom() -> dict:
+    """Degraded when any pool has less than HEALTH_MIN_POOL_HEADROOM of its capacity free"""
+    pools = {}
+    degraded = False
+    for name, stats in pool_stats().items():
+        capacity = stats["size"] + stats["max_overflow"]
+        headroom = 1 - stats["checked_out"] / capacity if capacity else 0
+        pools[name] = {"checked_out": stats["checked_out"], "capacity": capacity, "headroom": round(headroom, 3)}
+        degraded = degraded or headroom < settings.HEALTH_MIN_POOL_HEADROOM
+    return {"status": "degraded" if degraded else "ok", "pools": pools}
+
+
+def check_provider(name: str) -> dict:
+    """Outbound provider health from its circuit breaker - no extra call to the provider"""
+    provider = PROVIDERS.get(name)
+    if provider is None:
+        return {"status": "degraded", "error": f"unknown dependency {name}"}
+    state = provider.breaker.state
+    return {"status": "ok" if state == CircuitBreaker.CLOSED else "degraded", "circuit": state}
+
+
+async def readiness() -> dict:
+    checks = {
+        "database": await database_probe.check(),
+        "pool": check_pool_headroom(),
+    }
+    for name in settings.HEALTH_READY_DEPENDENCIES:
+        checks[name] = await redis_probe.check() if name == "redis" else check_provider(name)
+
+    ready = all(check["status"] == "ok" for check in checks.values())
+    return {"status": "ok" if ready else "degraded", "checks": checks}
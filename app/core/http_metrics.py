@@ -0,0 +1,20 @@
+import time
+from fastapi import Request
+from app.core.metrics import http_request_duration, http_requests, http_in_flight
+from app.core.query_stats import route_key
+
+
+async def http_metrics_middleware(request: Request, call_next):
+    """Latency, status and in-flight metrics per route template"""
+    http_in_flight.inc()
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        http_in_flight.dec()
+        route = route_key(request).split(" ", 1)[1]
+        http_request_duration.labels(method=request.method, route=route).observe(time.perf_counter() - start)
+        http_requests.labels(method=request.method, route=route, status=status_code).inc()
@@ -0,0 +1,237 @@
+"""
+In-process metrics with Prometheus text exposition (GET /metrics).
+
+Counters, gauges and histograms are sharded per thread: a writer only ever
+touches its own thread's cell, so the hot path takes no lock (the GIL makes
+the single-writer update safe). Readers sum the cells at scrape time, which
+is the only place the cost of aggregation is paid.
+
+Labelled series live in a MetricFamily; subsystems whose state is already
+tracked elsewhere (pools, providers, query stats) register a collector that
+renders their samples at scrape time.
+"""
+import threading
+from bisect import bisect_left
+
+# Latency buckets in seconds (upper bounds); +Inf is implicit
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Shards:
+    """Per-thread cells; the lock is only taken the first time a thread writes"""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+        self._cells = []
+        self._lock = threading.Lock()
+
+    def cell(self):
+        try:
+            return self._local.cell
+        except AttributeError:
+            cell = self._factory()
+            with self._lock:
+                self._cells.append(cell)
+            self._local.cell = cell
+            return cell
+
+    def cells(self) -> list:
+        return list(self._cells)
+
+
+class Counter:
+    """Monotonic counter"""
+
+    def __init__(self):
+        self._shards = _Shards(lambda: [0])
+
+    def inc(self, amount: int = 1):
+        self._shards.cell()[0] += amount
+
+    @property
+    def value(self):
+        return sum(cell[0] for cell in self._shards.cells())
+
+
+class Gauge:
+    """Up/down value (e.g. requests in flight); each thread keeps its own delta"""
+
+    def __init__(self):
+        self._shards = _Shards(lambda: [0])
+
+    def inc(self, amount: int = 1):
+        self._shards.cell()[0] += amount
+
+    def dec(self, amount: int = 1):
+        self._shards.cell()[0] -= amount
+
+    @property
+    def value(self):
+        return sum(cell[0] for cell in self._shards.cells())
+
+
+class _HistogramCell:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram:
+    """Cumulative bucket histogram (Prometheus semantics) for latency observations"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        size = len(self.buckets) + 1
+        self._shards = _Shards(lambda: _HistogramCell(size))
+
+    def observe(self, value: float):
+        cell = self._shards.cell()
+        cell.counts[bisect_left(self.buckets, value)] += 1
+        cell.sum += value
+
+    def snapshot(self) -> dict:
+        counts = [0] * (len(self.buckets) + 1)
+        total_sum = 0.0
+        for cell in self._shards.cells():
+            for index, count in enumerate(cell.counts):
+                counts[index] += count
+            total_sum += cell.sum
+
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+
+        return {"buckets": buckets, "count": cumulative, "sum": total_sum}
+
+
+class MetricFamily:
+    """One metric name with a child Counter/Gauge/Histogram per label combination"""
+
+    def __init__(self, kind: str, name: str, documentation: str, labelnames=(), factory=None):
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._factory())
+        return child
+
+    def samples(self) -> list:
+        samples = []
+        for key, child in list(self._children.items()):
+            labels = dict(zip(self.labelnames, key))
+            if self.kind == "histogram":
+                samples.extend(histogram_samples(self.name, labels, child.snapshot()))
+            else:
+                samples.append((self.name, labels, child.value))
+        return samples
+
+
+def histogram_samples(name: str, labels: dict, snapshot: dict) -> list:
+    """Prometheus _bucket/_sum/_count samples for a Histogram.snapshot()"""
+    samples = [(f"{name}_bucket", {**labels, "le": bound}, count) for bound, count in snapshot["buckets"].items()]
+    samples.append((f"{name}_sum", labels, snapshot["sum"]))
+    samples.append((f"{name}_count", labels, snapshot["count"]))
+    return samples
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._families = {}
+        self._collectors = []
+
+    def _family(self, kind, name, documentation, labelnames, factory) -> MetricFamily:
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = MetricFamily(kind, name, documentation, labelnames, factory)
+        return family
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> MetricFamily:
+        return self._family("counter", name, documentation, labelnames, Counter)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> MetricFamily:
+        return self._family("gauge", name, documentation, labelnames, Gauge)
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> MetricFamily:
+        return self._family("histogram", name, documentation, labelnames, lambda: Histogram(buckets))
+
+    def register_collector(self, collector):
+        """collector() -> [(name, kind, documentation, [(sample name, labels, value), ...]), ...]"""
+        self._collectors.append(collector)
+
+    def collect(self) -> list:
+        families = [
+            (family.name, family.kind, family.documentation, family.samples())
+            for family in self._families.values()
+        ]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                print("❌ Metrics collector failed:", str(e))
+        return families
+
+    def render(self) -> str:
+        """Prometheus text exposition format 0.0.4"""
+        lines = []
+        for name, kind, documentation, samples in self.collect():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for sample_name, labels, value in samples:
+                lines.append(f"{sample_name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+registry = MetricsRegistry()
+
+# HTTP server metrics (recorded by http_metrics_middleware)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time to produce the response headers, per route", ("method", "route")
+)
+http_requests = registry.counter(
+    "http_requests_total", "Completed requests per route and status code", ("method", "route", "status")
+)
+http_in_flight = registry.gauge("http_requests_in_flight", "Requests currently being handled").labels()
+
+# Outbound calls (Attestr, RML SMS, S3)
+outbound_request_duration = registry.histogram(
+    "outbound_request_duration_seconds", "Latency of calls to external providers", ("provider",)
+)
+outbound_requests = registry.counter(
+    "outbound_requests_total", "Calls to external providers by outcome (success / failure / client_error)",
+    ("provider", "outcome")
+)
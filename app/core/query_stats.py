@@ -0,0 +1,183 @@
+"""
+Per-request SQL statistics.
+
+A SQLAlchemy cursor hook records every statement run while a request is being
+handled (statement count, DB time, rows reported by the driver) into a
+context-local collector set up by `query_stats_middleware`. Identical statement
+text executed repeatedly within one request is flagged as a likely N+1.
+
+Results are aggregated per route (GET /metrics/queries), returned as X-DB-*
+response headers when DEBUG is on, and checked against QUERY_BUDGETS.
+
+Over-budget requests are only reported: by the time the count is known the
+handler may already have committed, so failing the response would make the
+client retry a write that went through. To enforce a budget, wrap the code in
+`track_queries(budget=...)` (tests, scripts), which raises instead.
+"""
+import threading
+import time
+from collections import Counter as StatementCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+from app.core.metrics import registry
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised by `track_queries` when the block ran more statements than its budget"""
+
+
+class QueryStats:
+    """Statements run within one request (or one `track_queries` block)"""
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.statements = StatementCounter()
+
+    def record(self, statement: str, elapsed: float, rowcount: int):
+        self.count += 1
+        self.db_time += elapsed
+        if rowcount and rowcount > 0:
+            self.rows += rowcount
+        self.statements[statement] += 1
+
+    def repeated_statements(self, threshold: int = None) -> dict:
+        """Statements executed at least `threshold` times - the N+1 suspects"""
+        threshold = settings.QUERY_N_PLUS_ONE_THRESHOLD if threshold is None else threshold
+        return {sql: n for sql, n in self.statements.items() if n >= threshold}
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or not conn.info.get("query_start"):
+        return
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats.record(statement, elapsed, cursor.rowcount)
+
+
+@contextmanager
+def track_queries(budget: int = None, route: str = None):
+    """
+    Collect statement stats for the enclosed block (scripts, tests). With a budget
+    (or a route from QUERY_BUDGETS), raise QueryBudgetExceeded if the block ran more.
+    """
+    budget = settings.QUERY_BUDGETS.get(route) if budget is None and route else budget
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    if budget is not None and stats.count > budget:
+        raise QueryBudgetExceeded(f"{stats.count} statements (budget {budget})")
+
+
+class RouteQueryStats:
+    """Running totals per route for the metrics endpoint"""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def add(self, route: str, stats: QueryStats, repeated: dict, over_budget: bool):
+        with self._lock:
+            totals = self._routes.setdefault(route, {
+                "requests": 0,
+                "statements": 0,
+                "db_time_seconds": 0.0,
+                "rows": 0,
+                "max_statements": 0,
+                "n_plus_one_requests": 0,
+                "budget_exceeded": 0,
+            })
+            totals["requests"] += 1
+            totals["statements"] += stats.count
+            totals["db_time_seconds"] += stats.db_time
+            totals["rows"] += stats.rows
+            totals["max_statements"] = max(totals["max_statements"], stats.count)
+            if repeated:
+                totals["n_plus_one_requests"] += 1
+            if over_budget:
+                totals["budget_exceeded"] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {route: dict(totals) for route, totals in self._routes.items()}
+        for totals in routes.values():
+            totals["avg_statements"] = round(totals["statements"] / totals["requests"], 2)
+            totals["budget"] = None
+        for route, budget in settings.QUERY_BUDGETS.items():
+            if route in routes:
+                routes[route]["budget"] = budget
+        return routes
+
+
+route_query_stats = RouteQueryStats()
+
+
+def route_key(request: Request) -> str:
+    """'METHOD /path/{template}' of the matched route, so ids don't fan out the keys"""
+    route = request.scope.get("route")
+    return f"{request.method} {route.path}" if route is not None else f"{request.method} <unmatched>"
+
+
+async def query_stats_middleware(request: Request, call_next):
+    stats = QueryStats()
+    token = _current.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        _current.reset(token)
+
+    route = route_key(request)
+    repeated = stats.repeated_statements()
+    budget = settings.QUERY_BUDGETS.get(route)
+    over_budget = budget is not None and stats.count > budget
+    route_query_stats.add(route, stats, repeated, over_budget)
+
+    for sql, n in repeated.items():
+        print(f"⚠️ Possible N+1 on {route}: {n} x {' '.join(sql.split())[:200]}")
+    if over_budget:
+        print(f"❌ Query budget exceeded on {route}: {stats.count} statements (budget {budget})")
+
+    if settings.DEBUG:
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-Ms"] = f"{stats.db_time * 1000:.2f}"
+        response.headers["X-DB-Rows"] = str(stats.rows)
+        response.headers["X-DB-Repeated-Statements"] = str(len(repeated))
+    return response
+
+
+def _collect_query_metrics() -> list:
+    routes = route_query_stats.snapshot()
+    families = (
+        ("db_statements_total", "SQL statements executed while handling requests", "statements"),
+        ("db_time_seconds_total", "Time spent in SQL statements while handling requests", "db_time_seconds"),
+        ("db_n_plus_one_requests_total", "Requests that repeated one statement past the N+1 threshold", "n_plus_one_requests"),
+        ("db_query_budget_exceeded_total", "Requests that ran more statements than their route budget", "budget_exceeded"),
+    )
+    return [
+        (name, "counter", documentation, [
+            (name, {"method": route.split(" ", 1)[0], "route": route.split(" ", 1)[1]}, totals[field])
+            for route, totals in routes.items()
+        ])
+        for name, documentation, field in families
+    ]
+
+
+registry.register_collector(_collect_query_metrics)
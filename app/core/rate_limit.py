@@ -0,0 +1,114 @@
+"""
+Sliding-window rate limits for unauthenticated, abuse-prone endpoints (OTP).
+
+Checks run before any DB access so bursts are rejected cheaply. The window is
+shared across workers through Redis when REDIS_URL is set, otherwise it is kept
+per process. A Redis outage fails open (logged) rather than blocking logins.
+"""
+import threading
+import time
+import uuid
+from collections import deque
+from fastapi import HTTPException, Request, status
+from app.config import settings
+from app.core.redis_client import get_sync_redis
+
+
+class InMemorySlidingWindow:
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._hits = {}
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        """Record a hit; returns 0 if allowed, else seconds until the next hit is allowed"""
+        now = time.monotonic()
+        with self._lock:
+            hits = self._hits.get(key)
+            if hits is None:
+                if len(self._hits) >= self.max_keys:
+                    self._sweep(now, window_seconds)
+                hits = self._hits[key] = deque()
+            while hits and hits[0] <= now - window_seconds:
+                hits.popleft()
+            if len(hits) >= limit:
+                return hits[0] + window_seconds - now
+            hits.append(now)
+            return 0
+
+    def _sweep(self, now: float, window_seconds: float):
+        for key in [key for key, hits in self._hits.items() if not hits or hits[-1] <= now - window_seconds]:
+            del self._hits[key]
+
+
+# Sorted set of hit timestamps (ms); returns 0 if allowed, else ms until a slot frees up
+_SLIDING_WINDOW = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    local oldest = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    return math.max(1, tonumber(oldest[2]) + window - now)
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('PEXPIRE', KEYS[1], window)
+return 0
+"""
+
+
+class RedisSlidingWindow:
+
+    def __init__(self, client, namespace: str = "ratelimit"):
+        self.namespace = namespace
+        self._script = client.register_script(_SLIDING_WINDOW)
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        window_ms = int(window_seconds * 1000)
+        retry_ms = self._script(
+            keys=[f"{self.namespace}:{key}"],
+            args=[int(time.time() * 1000), window_ms, limit, uuid.uuid4().hex]
+        )
+        return int(retry_ms) / 1000
+
+
+_local_window = InMemorySlidingWindow()
+_redis_window = None
+
+
+def _hit(key: str, limit: int, window_seconds: float) -> float:
+    global _redis_window
+    client = get_sync_redis()
+    if client is None:
+        return _local_window.hit(key, limit, window_seconds)
+    try:
+        if _redis_window is None:
+            _redis_window = RedisSlidingWindow(client)
+        return _redis_window.hit(key, limit, window_seconds)
+    except Exception as e:
+        print("❌ Redis rate limit check failed:", str(e))
+        return 0
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+def enforce_rate_limit(key: str, limit: int, window_seconds: float = None):
+    """Raise 429 (with Retry-After) once `key` has used up `limit` hits in the window"""
+    window = settings.RATE_LIMIT_WINDOW_SECONDS if window_seconds is None else window_seconds
+    retry_after = _hit(key, limit, window)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests. Please try again later.",
+            headers={"Retry-After": str(max(1, int(retry_after + 0.999)))}
+        )
+
+
+def enforce_otp_rate_limits(request: Request, action: str, phone_number: str, per_phone_limit: int):
+    """Per client IP and per phone limits for an OTP action (send / verify)"""
+    enforce_rate_limit(f"otp:{action}:client:{client_ip(request)}", settings.RATE_LIMIT_OTP_PER_CLIENT)
+    enforce_rate_limit(f"otp:{action}:phone:{phone_number}", per_phone_limit)
@@ -0,0 +1,26 @@
+import redis
+import redis.asyncio as aioredis
+from app.config import settings
+
+_async_client = None
+_sync_client = None
+
+
+def get_redis():
+    """Shared asyncio Redis client, or None when REDIS_URL is not configured"""
+    global _async_client
+    if not settings.REDIS_URL:
+        return None
+    if _async_client is None:
+        _async_client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _async_client
+
+
+def get_sync_redis():
+    """Shared blocking Redis client for sync code paths, or None when not configured"""
+    global _sync_client
+    if not settings.REDIS_URL:
+        return None
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    return _sync_client
@@ -0,0 +1,164 @@
+"""
+Cached JSON responses for read-heavy endpoints (the analytics reports).
+
+Entries are keyed on the request parameters plus a data version. Writes that
+change what the reports show (anything that moves the job rollup) mark their
+session, and the version is bumped once that session commits - so a cached
+report is never served after a committed change, and entries for old versions
+simply age out. With REDIS_URL set, entries and the version are shared across
+workers; otherwise each worker caches and versions on its own.
+
+Concurrent misses for the same key in one process share a single computation,
+and every response carries an ETag so unchanged reports revalidate with a 304.
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.cache import TieredCache
+from app.core.metrics import registry
+from app.core.redis_client import get_redis, get_sync_redis
+
+cache_requests = registry.counter(
+    "response_cache_requests_total", "Cached endpoint lookups by outcome (hit / miss / coalesced)",
+    ("cache", "endpoint", "outcome")
+)
+
+
+class ResponseCache:
+
+    def __init__(self, namespace: str, max_size: int, ttl_seconds: float):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.store = TieredCache(namespace, max_size, ttl_seconds)
+        self._local_version = 0
+        self._version_lock = threading.Lock()
+        self._inflight = {}
+        self._bumps = set()
+
+    @property
+    def _version_key(self) -> str:
+        return f"{self.namespace}:version"
+
+    def bump_version(self):
+        """
+        Invalidate every cached entry (called after a committed write; safe from any thread).
+        The local version moves at once; the shared one is bumped without ever blocking
+        the event loop: async routes commit on the loop thread, so there the Redis INCR
+        runs as a task after the commit returns.
+        """
+        with self._version_lock:
+            self._local_version += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is not None:
+            if get_redis() is not None:
+                task = loop.create_task(self._bump_shared_version())
+                self._bumps.add(task)
+                task.add_done_callback(self._bumps.discard)
+            return
+
+        # Worker thread (sync routes, background jobs): blocking here doesn't stall the loop
+        client = get_sync_redis()
+        if client is None:
+            return
+        try:
+            client.incr(self._version_key)
+        except Exception as e:
+            print(f"❌ Redis version bump failed for {self.namespace}:", str(e))
+
+    async def _bump_shared_version(self):
+        try:
+            await get_redis().incr(self._version_key)
+        except Exception as e:
+            print(f"❌ Redis version bump failed for {self.namespace}:", str(e))
+
+    async def version(self) -> str:
+        client = get_redis()
+        if client is not None:
+            try:
+                return f"r{await client.get(self._version_key) or 0}"
+            except Exception as e:
+                print(f"❌ Redis version read failed for {self.namespace}:", str(e))
+        return f"l{self._local_version}"
+
+    async def get_or_compute(self, key_parts: tuple, compute):
+        """(entry, outcome) for this key; compute() runs once per version across concurrent callers"""
+        key = "|".join(str(part) for part in key_parts) + f"|{await self.version()}"
+        if self.ttl_seconds <= 0:
+            return _entry(await compute()), "miss"
+
+        entry = await self.store.get(key)
+        if entry is not None:
+            return entry, "hit"
+
+        while True:
+            pending = self._inflight.get(key)
+            if pending is None:
+                break
+            entry = await asyncio.shield(pending)
+            if entry is not None:
+                return entry, "coalesced"
+            # The leader was cancelled (its client went away): one of the followers takes over
+
+        pending = self._inflight[key] = asyncio.get_running_loop().create_future()
+        # Followers re-raise the leader's error; don't warn when there are none
+        pending.add_done_callback(lambda future: future.cancelled() or future.exception())
+        try:
+            entry = _entry(await compute())
+            await self.store.set(key, entry)
+            pending.set_result(entry)
+            return entry, "miss"
+        except asyncio.CancelledError:
+            # Don't cancel the followers with us: None tells them to recompute
+            pending.set_result(None)
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            if self._inflight.get(key) is pending:
+                del self._inflight[key]
+
+    async def respond(self, request: Request, endpoint: str, key_parts: tuple, compute) -> Response:
+        """JSON response for a cacheable endpoint, or 304 when the client's ETag still matches"""
+        entry, outcome = await self.get_or_compute((endpoint, *key_parts), compute)
+        cache_requests.labels(cache=self.namespace, endpoint=endpoint, outcome=outcome).inc()
+
+        headers = {"ETag": entry["etag"], "Cache-Control": "private, no-cache", "X-Cache": outcome}
+        if_none_match = request.headers.get("if-none-match", "")
+        if entry["etag"] in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+
+def _entry(result) -> dict:
+    body = json.dumps(jsonable_encoder(result), separators=(",", ":"))
+    return {"body": body, "etag": f'"{hashlib.sha256(body.encode()).hexdigest()[:32]}"'}
+
+
+# /analytics/payout, /analytics/job-stages, /analytics/ip-performance
+analytics_cache = ResponseCache("analytics", settings.ANALYTICS_CACHE_MAX_SIZE, settings.ANALYTICS_CACHE_TTL_SECONDS)
+
+
+def mark_analytics_changed(db: Session):
+    """Bump the analytics version once this session's transaction commits"""
+    db.info["analytics_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_after_commit(session):
+    if session.info.pop("analytics_changed", False):
+        analytics_cache.bump_version()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session):
+    session.info.pop("analytics_changed", None)
@@ -0,0 +1,57 @@
+"""
+Async counterparts of the CRUD modules for `async def` routes.
+
+Each function takes an AsyncSession and runs the sync CRUD function on the
+session's underlying Session via `AsyncSession.run_sync`, so statements go
+through the asyncio driver without blocking the event loop and the business
+logic (validation, IP assignment, status logs, rollup) lives in one place.
+"""
+from functools import wraps
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import job, ip, analytics, rollup, job_attachment, job_bulk, job_status_log, job_duration
+
+
+def _async(fn):
+    @wraps(fn)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(fn, *args, **kwargs)
+    return wrapper
+
+
+# Jobs
+get_job_by_id = _async(job.get_job_by_id)
+get_all_jobs = _async(job.get_all_jobs)
+create_job = _async(job.create_job)
+update_job = _async(job.update_job)
+delete_job = _async(job.delete_job)
+start_job = _async(job.start_job)
+pause_job = _async(job.pause_job)
+finish_job = _async(job.finish_job)
+get_job_status_history = _async(job.get_job_status_history)
+create_jobs_bulk = _async(job_bulk.create_jobs_bulk)
+transition_jobs_bulk = _async(job_bulk.transition_jobs_bulk)
+archive_status_logs = _async(job_status_log.archive_status_logs)
+
+# Job attachments
+add_job_attachments = _async(job_attachment.add_job_attachments)
+list_job_attachments = _async(job_attachment.list_job_attachments)
+record_job_attachment = _async(job_attachment.record_job_attachment)
+
+# IPs
+get_ip_by_id = _async(ip.get_ip_by_id)
+get_ip_by_phone = _async(ip.get_ip_by_phone)
+get_all_ips = _async(ip.get_all_ips)
+verify_ip_user = _async(ip.verify_ip_user)
+assign_ip = _async(ip.assign_ip)
+unassign_ip = _async(ip.unassign_ip)
+check_ip_available = _async(ip.check_ip_available)
+
+# Analytics
+get_payout_analytics = _async(analytics.get_payout_analytics)
+get_job_stage_summary = _async(analytics.get_job_stage_summary)
+get_ip_performance = _async(analytics.get_ip_performance)
+get_job_duration_analytics = _async(analytics.get_job_duration_analytics)
+get_job_duration = _async(analytics.get_job_duration)
+refresh_job_durations = _async(job_duration.refresh_job_durations)
+rebuild_job_rollup = _async(rollup.rebuild_job_rollup)
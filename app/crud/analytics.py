@@ -1,11 +1,16 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import func, extract, and_
 from fastapi import HTTPException
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from app.model.job import Job
 from app.model.ip import ip
-from app.schemas.analytics import JobStageCount, PayoutByIP, PayoutSummary
+from app.model.job_daily_rollup import JobDailyRollup
+from app.model.job_duration_stats import JobDurationStats
+from app.schemas.analytics import (
+    JobStageCount, PayoutByIP, PayoutSummary, JobDurationGroup, JobDurationSummary, JobDuration
+)
+from app.crud.job_duration import live_seconds
 
 def get_date_range(period: str, year: int = None, month: int = None, quarter: int = None, week: int = None):
     """Calculate start and end dates based on period type"""
@@ -94,44 +99,49 @@ def get_payout_analytics(
     year: int = None,
     month: int = None,
     quarter: int = None,
-    week: int = None
+    week: int = None,
+    single_pass: bool = False
 ):
     """
     Get comprehensive payout analytics for a given period
     - Total payout (calculated as rate * some area/quantity metric if you have one)
     - Jobs by stage
     - Payout per IP
+    Served from the daily rollup, so cost depends on days in the period, not job history.
+    With single_pass=True everything is derived from one grouped statement (one round trip).
     """
     try:
         # Get date range
         start_date, end_date = get_date_range(period, year, month, quarter, week)
         
-        # Query jobs in the date range (using delivery_date as the reference)
-        jobs_query = db.query(Job).filter(
-            Job.delivery_date >= start_date,
-            Job.delivery_date <= end_date
+        if single_pass:
+            return _payout_summary_single_pass(db, period, start_date, end_date)
+        
+        # Rollup buckets in the date range (keyed on delivery_date)
+        in_period = and_(
+            JobDailyRollup.day >= start_date,
+            JobDailyRollup.day <= end_date
         )
         
         # Total jobs count
-        total_jobs = jobs_query.count()
-        
-        # Calculate total payout (rate * size) for completed jobs only
-        # If size is NULL, we'll default to 0 for that job
-        total_payout = db.query(func.sum(Job.rate * func.coalesce(Job.size, 0))).filter(
-            Job.delivery_date >= start_date,
-            Job.delivery_date <= end_date,
-            Job.status == 'completed'
+        total_jobs = db.query(
+            func.coalesce(func.sum(JobDailyRollup.job_count), 0)
+        ).filter(in_period).scalar() or 0
+        
+        # Total payout (rate * size) for completed jobs only
+        total_payout = db.query(func.sum(JobDailyRollup.total_payout)).filter(
+            in_period,
+            JobDailyRollup.status == 'completed'
         ).scalar() or Decimal(0)
         
         # Jobs by stage with payout = rate * size
         job_stages = db.query(
-            Job.status,
-            func.count(Job.id).label('count'),
-            func.sum(Job.rate * func.coalesce(Job.size, 0)).label('total_payout')
-        ).filter(
-            Job.delivery_date >= start_date,
-            Job.delivery_date <= end_date
-        ).group_by(Job.status).all()
+            JobDailyRollup.status,
+            func.sum(JobDailyRollup.job_count).label('count'),
+            func.sum(JobDailyRollup.total_payout).label('total_payout')
+        ).filter(in_period).group_by(JobDailyRollup.status).having(
+            func.sum(JobDailyRollup.job_count) > 0
+        ).all()
         
         job_stage_list = [
             JobStageCount(
@@ -146,15 +156,16 @@ def get_payout_analytics(
         payout_by_ip = db.query(
             ip.id,
             (ip.first_name + ' ' + ip.last_name).label('ip_name'),
-            func.count(Job.id).label('job_count'),
-            func.sum(Job.rate * func.coalesce(Job.size, 0)).label('total_payout')
+            func.sum(JobDailyRollup.job_count).label('job_count'),
+            func.sum(JobDailyRollup.total_payout).label('total_payout')
         ).join(
-            Job, Job.assigned_ip_id == ip.id
+            JobDailyRollup, JobDailyRollup.assigned_ip_id == ip.id
         ).filter(
-            Job.delivery_date >= start_date,
-            Job.delivery_date <= end_date,
-            Job.status == 'completed'
-        ).group_by(ip.id, ip.first_name, ip.last_name).all()
+            in_period,
+            JobDailyRollup.status == 'completed'
+        ).group_by(ip.id, ip.first_name, ip.last_name).having(
+            func.sum(JobDailyRollup.job_count) > 0
+        ).all()
         
         payout_by_ip_list = [
             PayoutByIP(
@@ -185,14 +196,78 @@ def get_payout_analytics(
         raise HTTPException(status_code=500, detail=f"Error fetching analytics: {str(e)}")
 
 
+def _payout_summary_single_pass(db: Session, period: str, start_date: date, end_date: date) -> PayoutSummary:
+    """
+    Build the payout summary from a single statement grouped by (status, IP).
+    Every figure in the summary is a roll-up of these rows, so totals, stages and
+    per-IP payout are folded in Python instead of issuing four filtered queries.
+    """
+    rows = db.query(
+        JobDailyRollup.status,
+        JobDailyRollup.assigned_ip_id,
+        (ip.first_name + ' ' + ip.last_name).label('ip_name'),
+        func.sum(JobDailyRollup.job_count).label('job_count'),
+        func.sum(JobDailyRollup.total_payout).label('total_payout')
+    ).outerjoin(
+        ip, ip.id == JobDailyRollup.assigned_ip_id
+    ).filter(
+        JobDailyRollup.day >= start_date,
+        JobDailyRollup.day <= end_date
+    ).group_by(
+        JobDailyRollup.status, JobDailyRollup.assigned_ip_id, ip.first_name, ip.last_name
+    ).all()
+    
+    total_jobs = 0
+    total_payout = Decimal(0)
+    stages = {}
+    payout_by_ip = {}
+    
+    for row in rows:
+        count = row.job_count or 0
+        payout = row.total_payout or Decimal(0)
+        if count <= 0:
+            continue
+        
+        total_jobs += count
+        stage = stages.setdefault(row.status, [0, Decimal(0)])
+        stage[0] += count
+        stage[1] += payout
+        
+        if row.status == 'completed':
+            total_payout += payout
+            # Same join semantics as the multi-query path: only IPs that still exist
+            if row.assigned_ip_id is not None and row.ip_name is not None:
+                item = payout_by_ip.setdefault(row.assigned_ip_id, [row.ip_name, 0, Decimal(0)])
+                item[1] += count
+                item[2] += payout
+    
+    return PayoutSummary(
+        period=period,
+        start_date=start_date,
+        end_date=end_date,
+        total_jobs=total_jobs,
+        total_payout=total_payout,
+        job_stages=[
+            JobStageCount(status=status, count=count, total_payout=payout)
+            for status, (count, payout) in stages.items()
+        ],
+        payout_by_ip=[
+            PayoutByIP(ip_id=ip_id, ip_name=name, job_count=count, total_payout=payout)
+            for ip_id, (name, count, payout) in payout_by_ip.items()
+        ]
+    )
+
+
 def get_job_stage_summary(db: Session):
     """Get current count of jobs in each stage (all time) with payout = rate * size"""
     try:
         job_stages = db.query(
-            Job.status,
-            func.count(Job.id).label('count'),
-            func.sum(Job.rate * func.coalesce(Job.size, 0)).label('total_payout')
-        ).group_by(Job.status).all()
+            JobDailyRollup.status,
+            func.sum(JobDailyRollup.job_count).label('count'),
+            func.sum(JobDailyRollup.total_payout).label('total_payout')
+        ).group_by(JobDailyRollup.status).having(
+            func.sum(JobDailyRollup.job_count) > 0
+        ).all()
         
         return [
             JobStageCount(
@@ -212,10 +287,10 @@ def get_ip_performance(db: Session):
         ip_stats = db.query(
             ip.id,
             (ip.first_name + ' ' + ip.last_name).label('ip_name'),
-            func.count(Job.id).label('job_count'),
-            func.sum(Job.rate * func.coalesce(Job.size, 0)).label('total_payout')
+            func.sum(JobDailyRollup.job_count).label('job_count'),
+            func.sum(JobDailyRollup.total_payout).label('total_payout')
         ).outerjoin(
-            Job, and_(Job.assigned_ip_id == ip.id, Job.status == 'completed')
+            JobDailyRollup, and_(JobDailyRollup.assigned_ip_id == ip.id, JobDailyRollup.status == 'completed')
         ).group_by(ip.id, ip.first_name, ip.last_name).all()
         
         return [
@@ -228,4 +303,109 @@ def get_ip_performance(db: Session):
             for item in ip_stats
         ]
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching IP performance: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching IP performance: {str(e)}")
+
+
+# Job column each duration breakdown groups on
+DURATION_GROUPS = {"ip": Job.assigned_ip_id, "city": Job.city, "type": Job.type}
+
+
+def get_job_duration_analytics(
+    db: Session,
+    group_by: str,
+    period: str = None,
+    year: int = None,
+    month: int = None,
+    quarter: int = None,
+    week: int = None
+):
+    """
+    Time in progress / paused and pause count per IP, city or job type, for jobs that
+    have been started (optionally only those delivered in a period). Read-only: stats are
+    kept up to date in the background; open segments count up to now.
+    """
+    try:
+        group_column = DURATION_GROUPS.get(group_by)
+        if group_column is None:
+            raise HTTPException(status_code=400, detail="Invalid group_by. Use 'ip', 'city', or 'type'")
+        start_date, end_date = get_date_range(period, year, month, quarter, week) if period else (None, None)
+        
+        dialect = db.get_bind().dialect.name
+        now = datetime.utcnow()
+        active = live_seconds(dialect, "in_progress", JobDurationStats.active_seconds, now)
+        paused = live_seconds(dialect, "paused", JobDurationStats.paused_seconds, now)
+        
+        group_columns = [group_column]
+        if group_by == "ip":
+            group_columns += [ip.first_name, ip.last_name]
+        
+        query = db.query(
+            *group_columns,
+            func.count(JobDurationStats.job_id).label('job_count'),
+            func.sum(JobDurationStats.pause_count).label('pause_count'),
+            func.sum(active).label('active_seconds'),
+            func.sum(paused).label('paused_seconds')
+        ).join(
+            Job, Job.id == JobDurationStats.job_id
+        ).filter(
+            JobDurationStats.first_started_at.isnot(None)
+        )
+        if group_by == "ip":
+            query = query.outerjoin(ip, ip.id == Job.assigned_ip_id)
+        if period:
+            query = query.filter(Job.delivery_date >= start_date, Job.delivery_date <= end_date)
+        
+        groups = []
+        for row in query.group_by(*group_columns).all():
+            active_seconds = float(row.active_seconds or 0)
+            paused_seconds = float(row.paused_seconds or 0)
+            groups.append(JobDurationGroup(
+                group=None if row[0] is None else str(row[0]),
+                ip_name=f"{row.first_name} {row.last_name}" if group_by == "ip" and row.first_name else None,
+                job_count=row.job_count,
+                pause_count=row.pause_count or 0,
+                active_seconds=round(active_seconds, 1),
+                paused_seconds=round(paused_seconds, 1),
+                avg_active_seconds=round(active_seconds / row.job_count, 1),
+                avg_paused_seconds=round(paused_seconds / row.job_count, 1)
+            ))
+        
+        return JobDurationSummary(group_by=group_by, start_date=start_date, end_date=end_date, groups=groups)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching job durations: {str(e)}")
+
+
+def get_job_duration(db: Session, job_id: int):
+    """Time in progress / paused and pause count of one job, up to now"""
+    try:
+        job_status = db.query(Job.status).filter(Job.id == job_id).scalar()
+        if job_status is None:
+            raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+        
+        dialect = db.get_bind().dialect.name
+        now = datetime.utcnow()
+        stats = db.query(
+            live_seconds(dialect, "in_progress", JobDurationStats.active_seconds, now).label('active_seconds'),
+            live_seconds(dialect, "paused", JobDurationStats.paused_seconds, now).label('paused_seconds'),
+            JobDurationStats.pause_count,
+            JobDurationStats.first_started_at,
+            JobDurationStats.completed_at
+        ).filter(JobDurationStats.job_id == job_id).first()
+        
+        if stats is None:
+            return JobDuration(job_id=job_id, status=job_status, active_seconds=0, paused_seconds=0, pause_count=0)
+        return JobDuration(
+            job_id=job_id,
+            status=job_status,
+            active_seconds=round(float(stats.active_seconds), 1),
+            paused_seconds=round(float(stats.paused_seconds), 1),
+            pause_count=stats.pause_count,
+            first_started_at=stats.first_started_at,
+            completed_at=stats.completed_at
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching job duration: {str(e)}")
@@ -1,6 +1,8 @@
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 from app.model.ip import ip
 from fastapi import HTTPException
+from app.core.cache import invalidate_user, invalidate_user_on_commit
 
 def get_ip_by_id(db:Session,id:int):
     return db.query(ip).filter(ip.id==id).first()
@@ -16,28 +18,37 @@ def verify_ip_user(db: Session, phone_number: str):
     if db_ip:
         db_ip.is_idverified = True
         db.commit()
+        invalidate_user(db_ip.id)
         db.refresh(db_ip)
     return db_ip
 
-def assign_ip(db: Session, ip_id: int, commit: bool = True):
-    """Assign an IP to a job - marks is_assigned=True"""
+def _ip_missing_or_taken(db: Session, ip_id: int):
+    """Failure path of a conditional update: 404 if the IP doesn't exist, else 400"""
+    if not db.query(ip.id).filter(ip.id == ip_id).first():
+        raise HTTPException(status_code=404, detail=f"IP with ID {ip_id} not found")
+    raise HTTPException(status_code=400, detail=f"IP {ip_id} is already assigned to another job")
+
+def assign_ip(db: Session, ip_id: int, commit: bool = True) -> int:
+    """
+    Assign an IP to a job - marks is_assigned=True.
+    Single conditional UPDATE: of two concurrent callers for the same IP exactly one wins.
+    """
     try:
-        ip_user = db.query(ip).filter(ip.id == ip_id).first()
-        if not ip_user:
-            raise HTTPException(status_code=404, detail=f"IP with ID {ip_id} not found")
-        
-        if ip_user.is_assigned:
-            raise HTTPException(status_code=400, detail=f"IP {ip_id} is already assigned to another job")
-        
-        ip_user.is_assigned = True
+        assigned = db.execute(
+            update(ip)
+            .where(ip.id == ip_id, ip.is_assigned.isnot(True))
+            .values(is_assigned=True)
+            .returning(ip.id)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if assigned is None:
+            _ip_missing_or_taken(db, ip_id)
         
+        # Dropped from the user cache only once the update is committed (here or by the caller)
+        invalidate_user_on_commit(db, ip_id)
         if commit:
             db.commit()
-            db.refresh(ip_user)
-        else:
-            db.flush()  # Flush changes without committing
-            
-        return ip_user
+        return ip_id
     except HTTPException:
         raise
     except Exception as e:
@@ -45,22 +56,22 @@ def assign_ip(db: Session, ip_id: int, commit: bool = True):
             db.rollback()
         raise HTTPException(status_code=500, detail=f"Error assigning IP: {str(e)}")
 
-def unassign_ip(db: Session, ip_id: int, commit: bool = True):
+def unassign_ip(db: Session, ip_id: int, commit: bool = True) -> int:
     """Unassign an IP from a job - marks is_assigned=False"""
     try:
-        ip_user = db.query(ip).filter(ip.id == ip_id).first()
-        if not ip_user:
+        result = db.execute(
+            update(ip)
+            .where(ip.id == ip_id)
+            .values(is_assigned=False)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
             raise HTTPException(status_code=404, detail=f"IP with ID {ip_id} not found")
         
-        ip_user.is_assigned = False
-        
+        invalidate_user_on_commit(db, ip_id)
         if commit:
             db.commit()
-            db.refresh(ip_user)
-        else:
-            db.flush()  # Flush changes without committing
-            
-        return ip_user
+        return ip_id
     except HTTPException:
         raise
     except Exception as e:
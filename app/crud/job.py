@@ -1,12 +1,23 @@
+import base64
+import json
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from app.model.job import Job
 from app.model.ip import ip
 from app.model.job_status_log import JobStatusLog
+from app.model.job_status_log_archive import JobStatusLogArchive
+from app.model.job_duration_stats import JobDurationStats
+from app.model.job_attachment import JobAttachment
 from app.schemas.job import JobCreate, JobUpdate
 from app.schemas.job_status_log import JobStatusLogCreate
 from fastapi import HTTPException
 from datetime import date, datetime
 from app.crud.ip import assign_ip, unassign_ip, check_ip_available
+from app.crud.rollup import (
+    add_job_to_rollup, remove_job_from_rollup, move_job_in_rollup, job_rollup_key, job_payout
+)
+from app.crud.job_status_log import get_status_log_page
+from app.core.events import job_events, job_change
 
 def get_job_by_id(db: Session, job_id: int):
     """Get a job by ID with error handling"""
@@ -20,16 +31,93 @@ def get_job_by_id(db: Session, job_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def get_all_jobs(db: Session, skip: int = 0, limit: int = 100, status: str = None):
-    """Get all jobs with optional status filter and error handling"""
+# Columns returned by GET /jobs (everything JobResponse serializes)
+JOB_LIST_COLUMNS = (
+    Job.id, Job.name, Job.customer_name, Job.address, Job.city, Job.pincode, Job.type,
+    Job.rate, Job.size, Job.assigned_ip_id, Job.delivery_date, Job.checklist_link,
+    Job.google_map_link, Job.status
+)
+
+def encode_job_cursor(row: dict) -> str:
+    """Opaque keyset cursor pointing just after this row in (delivery_date, id) order"""
+    raw = json.dumps([row["delivery_date"].isoformat(), row["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_job_cursor(cursor: str):
+    try:
+        delivery_date, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(delivery_date), int(job_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def get_all_jobs(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    status: str = None,
+    city: str = None,
+    type: str = None,
+    date_from: date = None,
+    date_to: date = None,
+    cursor: str = None
+):
+    """
+    Get jobs ordered by (delivery_date, id) as plain dicts, with optional filters.
+    Pass the cursor of the previous page for constant-time paging; skip is kept for
+    old clients and gets slower the deeper it goes.
+    """
     try:
-        query = db.query(Job)
+        query = db.query(*JOB_LIST_COLUMNS)
         if status:
             query = query.filter(Job.status == status)
-        return query.offset(skip).limit(limit).all()
+        if city:
+            query = query.filter(Job.city == city)
+        if type:
+            query = query.filter(Job.type == type)
+        if date_from:
+            query = query.filter(Job.delivery_date >= date_from)
+        if date_to:
+            query = query.filter(Job.delivery_date <= date_to)
+        
+        if cursor:
+            query = query.filter(tuple_(Job.delivery_date, Job.id) > decode_job_cursor(cursor))
+        elif skip:
+            query = query.offset(skip)
+        
+        rows = query.order_by(Job.delivery_date.asc(), Job.id.asc()).limit(limit)
+        return [row._asdict() for row in rows]
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
+# Columns served to partners in the job feed (/verification/panel-access)
+JOB_FEED_COLUMNS = (
+    Job.id, Job.name, Job.customer_name, Job.address, Job.city, Job.status, Job.pincode,
+    Job.assigned_ip_id, Job.type, Job.rate, Job.size, Job.delivery_date, Job.checklist_link
+)
+
+def get_job_feed_page(db: Session, after_id: int = None, limit: int = 100):
+    """One keyset page of the job feed as plain dicts (column projection, no ORM objects)"""
+    try:
+        query = db.query(*JOB_FEED_COLUMNS)
+        if after_id is not None:
+            query = query.filter(Job.id > after_id)
+        return [row._asdict() for row in query.order_by(Job.id.asc()).limit(limit)]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
+
+def iter_job_feed_pages(db: Session, batch_size: int = 500):
+    """Yield the whole job feed page by page so memory stays bounded by batch_size"""
+    after_id = None
+    while True:
+        page = get_job_feed_page(db, after_id=after_id, limit=batch_size)
+        if page:
+            yield page
+        if len(page) < batch_size:
+            return
+        after_id = page[-1]["id"]
+
 def create_job(db: Session, job: JobCreate):
     """Create a new job with IP validation and error handling"""
     try:
@@ -46,6 +134,7 @@ def create_job(db: Session, job: JobCreate):
         db_job = Job(**job_data)
         db.add(db_job)
         db.flush()  # Flush to get the job ID
+        add_job_to_rollup(db, db_job)
         
         # Log the job creation
         status_log = JobStatusLog(
@@ -58,6 +147,7 @@ def create_job(db: Session, job: JobCreate):
         
         db.commit()
         db.refresh(db_job)
+        job_events.publish("create", [job_change(db_job, None)])
         return db_job
     except HTTPException:
         db.rollback()
@@ -69,11 +159,14 @@ def create_job(db: Session, job: JobCreate):
 def update_job(db: Session, job_id: int, job_update: JobUpdate):
     """Update a job - IP will be assigned/unassigned based on job status changes"""
     try:
-        db_job = db.query(Job).filter(Job.id == job_id).first()
+        db_job = db.query(Job).filter(Job.id == job_id).with_for_update().first()
         if not db_job:
             raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
         
         update_data = job_update.model_dump(exclude_unset=True)
+        previous_status = db_job.status
+        old_rollup_key = job_rollup_key(db_job)
+        old_payout = job_payout(db_job)
         
         # Handle IP assignment changes
         if 'assigned_ip_id' in update_data and update_data['assigned_ip_id']:
@@ -93,8 +186,12 @@ def update_job(db: Session, job_id: int, job_update: JobUpdate):
         for field, value in update_data.items():
             setattr(db_job, field, value)
         
+        move_job_in_rollup(db, old_rollup_key, old_payout, db_job)
+        
         db.commit()
         db.refresh(db_job)
+        if db_job.status != previous_status:
+            job_events.publish("update", [job_change(db_job, previous_status)])
         return db_job
     except HTTPException:
         db.rollback()
@@ -106,7 +203,7 @@ def update_job(db: Session, job_id: int, job_update: JobUpdate):
 def delete_job(db: Session, job_id: int):
     """Delete a job, its status logs, and unassign its IP with error handling"""
     try:
-        db_job = db.query(Job).filter(Job.id == job_id).first()
+        db_job = db.query(Job).filter(Job.id == job_id).with_for_update().first()
         if not db_job:
             raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
         
@@ -114,11 +211,17 @@ def delete_job(db: Session, job_id: int):
         if db_job.assigned_ip_id:
             unassign_ip(db, db_job.assigned_ip_id, commit=False)
         
-        # Delete all status logs for this job
+        # Delete all status logs and attachment records for this job
         db.query(JobStatusLog).filter(JobStatusLog.job_id == job_id).delete(synchronize_session=False)
+        db.query(JobStatusLogArchive).filter(JobStatusLogArchive.job_id == job_id).delete(synchronize_session=False)
+        db.query(JobDurationStats).filter(JobDurationStats.job_id == job_id).delete(synchronize_session=False)
+        db.query(JobAttachment).filter(JobAttachment.job_id == job_id).delete(synchronize_session=False)
         
+        remove_job_from_rollup(db, db_job)
+        change = {**job_change(db_job, db_job.status), "status": "deleted"}
         db.delete(db_job)
         db.commit()
+        job_events.publish("delete", [change])
         return {"message": "Job deleted successfully"}
     except HTTPException:
         db.rollback()
@@ -127,127 +230,123 @@ def delete_job(db: Session, job_id: int):
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting job: {str(e)}")
 
-def start_job(db: Session, job_id: int, notes: str = None):
-    """Start a job - ASSIGNS the IP when starting"""
+def _lock_job(db: Session, job_id: int) -> Job:
+    db_job = db.query(Job).filter(Job.id == job_id).with_for_update().first()
+    if not db_job:
+        raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
+    return db_job
+
+def apply_start(db: Session, db_job: Job, notes: str = None):
+    """Start/resume a locked job in the caller's transaction (no commit) - ASSIGNS the IP"""
+    if db_job.status != "created" and db_job.status != "paused":
+        raise HTTPException(status_code=400, detail=f"Job cannot be started. Current status: {db_job.status}")
+    
+    # Assign IP when starting or resuming
+    if db_job.assigned_ip_id:
+        assign_ip(db, db_job.assigned_ip_id, commit=False)
+    else:
+        raise HTTPException(status_code=400, detail="Cannot start job without an assigned IP")
+    
+    old_rollup_key = job_rollup_key(db_job)
+    previous_status = db_job.status
+    db_job.status = "in_progress"
+    move_job_in_rollup(db, old_rollup_key, job_payout(db_job), db_job)
+    
+    # Log the status change
+    db.add(JobStatusLog(
+        job_id=db_job.id,
+        status="in_progress",
+        timestamp=datetime.utcnow(),
+        notes=notes or ("Job resumed" if previous_status == "paused" else "Job started")
+    ))
+
+def apply_pause(db: Session, db_job: Job, notes: str = None):
+    """Pause a locked job in the caller's transaction (no commit) - UNASSIGNS the IP"""
+    if db_job.status != "in_progress":
+        raise HTTPException(status_code=400, detail=f"Only jobs in progress can be paused. Current status: {db_job.status}")
+    
+    if db_job.assigned_ip_id:
+        unassign_ip(db, db_job.assigned_ip_id, commit=False)
+    
+    old_rollup_key = job_rollup_key(db_job)
+    db_job.status = "paused"
+    move_job_in_rollup(db, old_rollup_key, job_payout(db_job), db_job)
+    
+    db.add(JobStatusLog(
+        job_id=db_job.id,
+        status="paused",
+        timestamp=datetime.utcnow(),
+        notes=notes or "Job paused"
+    ))
+
+def apply_finish(db: Session, db_job: Job, notes: str = None):
+    """Finish a locked job in the caller's transaction (no commit) - UNASSIGNS the IP"""
+    if db_job.status != "in_progress":
+        raise HTTPException(status_code=400, detail=f"Only jobs in progress can be finished. Current status: {db_job.status}")
+    
+    # Unassign IP when completing the job
+    if db_job.assigned_ip_id:
+        unassign_ip(db, db_job.assigned_ip_id, commit=False)
+    
+    old_rollup_key = job_rollup_key(db_job)
+    db_job.status = "completed"
+    move_job_in_rollup(db, old_rollup_key, job_payout(db_job), db_job)
+    
+    db.add(JobStatusLog(
+        job_id=db_job.id,
+        status="completed",
+        timestamp=datetime.utcnow(),
+        notes=notes or "Job completed"
+    ))
+
+def _transition_job(db: Session, job_id: int, apply, notes: str, action: str, source: str):
     try:
-        db_job = db.query(Job).filter(Job.id == job_id).first()
-        if not db_job:
-            raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
-        
-        if db_job.status != "created" and db_job.status != "paused":
-            raise HTTPException(status_code=400, detail=f"Job cannot be started. Current status: {db_job.status}")
-        
-        # Assign IP when starting or resuming
-        if db_job.assigned_ip_id:
-            assign_ip(db, db_job.assigned_ip_id, commit=False)
-        else:
-            raise HTTPException(status_code=400, detail="Cannot start job without an assigned IP")
-        
-        db_job.status = "in_progress"
-        
-        # Log the status change
-        status_log = JobStatusLog(
-            job_id=job_id,
-            status="in_progress",
-            timestamp=datetime.utcnow(),
-            notes=notes or ("Job resumed" if db_job.status == "paused" else "Job started")
-        )
-        db.add(status_log)
-        
+        db_job = _lock_job(db, job_id)
+        previous_status = db_job.status
+        apply(db, db_job, notes)
         db.commit()
         db.refresh(db_job)
+        job_events.publish(source, [job_change(db_job, previous_status)])
         return db_job
     except HTTPException:
         db.rollback()
         raise
     except Exception as e:
         db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error starting job: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error {action} job: {str(e)}")
+
+def start_job(db: Session, job_id: int, notes: str = None):
+    """Start a job - ASSIGNS the IP when starting"""
+    return _transition_job(db, job_id, apply_start, notes, "starting", "start")
 
 def pause_job(db: Session, job_id: int, notes: str = None):
     """Pause a job - UNASSIGNS the IP during pause"""
-    try:
-        db_job = db.query(Job).filter(Job.id == job_id).first()
-        if not db_job:
-            raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
-        
-        if db_job.status != "in_progress":
-            raise HTTPException(status_code=400, detail=f"Only jobs in progress can be paused. Current status: {db_job.status}")
-        
-        if db_job.assigned_ip_id:
-            unassign_ip(db,db_job.assigned_ip_id,commit=False)
-
-        db_job.status = "paused"
-        
-        # Log the status change
-        status_log = JobStatusLog(
-            job_id=job_id,
-            status="paused",
-            timestamp=datetime.utcnow(),
-            notes=notes or "Job paused"
-        )
-        db.add(status_log)
-        
-        db.commit()
-        db.refresh(db_job)
-        return db_job
-    except HTTPException:
-        db.rollback()
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error pausing job: {str(e)}")
+    return _transition_job(db, job_id, apply_pause, notes, "pausing", "pause")
 
 def finish_job(db: Session, job_id: int, notes: str = None):
     """Finish a job - UNASSIGNS the IP when completing"""
-    try:
-        db_job = db.query(Job).filter(Job.id == job_id).first()
-        if not db_job:
-            raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
-        
-        if db_job.status != "in_progress":
-            raise HTTPException(status_code=400, detail=f"Only jobs in progress can be finished. Current status: {db_job.status}")
-        
-        # Unassign IP when completing the job
-        if db_job.assigned_ip_id:
-            unassign_ip(db, db_job.assigned_ip_id, commit=False)
-        
-        db_job.status = "completed"
-        
-        # Log the status change
-        status_log = JobStatusLog(
-            job_id=job_id,
-            status="completed",
-            timestamp=datetime.utcnow(),
-            notes=notes or "Job completed"
-        )
-        db.add(status_log)
-        
-        db.commit()
-        db.refresh(db_job)
-        return db_job
-    except HTTPException:
-        db.rollback()
-        raise
-    except Exception as e:
-        db.rollback()
-        raise HTTPException(status_code=500, detail=f"Error finishing job: {str(e)}")
+    return _transition_job(db, job_id, apply_finish, notes, "finishing", "finish")
 
-def get_job_status_history(db: Session, job_id: int):
-    """Get the complete status history of a job including all pauses and resumes"""
+def get_job_status_history(
+    db: Session,
+    job_id: int,
+    since: datetime = None,
+    until: datetime = None,
+    cursor: str = None,
+    limit: int = None
+):
+    """
+    Status history of a job (including all pauses and resumes), oldest first, across
+    the live and archived log. Pass limit + the previous page's cursor to page through
+    long histories; since/until bound it to a time range.
+    """
     try:
         # Check if job exists
-        db_job = db.query(Job).filter(Job.id == job_id).first()
-        if not db_job:
+        if db.query(Job.id).filter(Job.id == job_id).first() is None:
             raise HTTPException(status_code=404, detail=f"Job with ID {job_id} not found")
         
-        # Get all status logs for this job, ordered by timestamp
-        status_logs = db.query(JobStatusLog).filter(
-            JobStatusLog.job_id == job_id
-        ).order_by(JobStatusLog.timestamp.asc()).all()
-        
-        return status_logs
+        return get_status_log_page(db, job_id, since=since, until=until, cursor=cursor, limit=limit)
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error fetching job status history: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Error fetching job status history: {str(e)}")
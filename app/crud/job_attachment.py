@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.model.job_attachment import JobAttachment
+
+# Columns needed to render a gallery entry
+ATTACHMENT_COLUMNS = (
+    JobAttachment.id, JobAttachment.job_id, JobAttachment.s3_key, JobAttachment.file_url,
+    JobAttachment.filename, JobAttachment.content_type, JobAttachment.size,
+    JobAttachment.uploaded_by_ip_id, JobAttachment.uploaded_at
+)
+
+def encode_attachment_cursor(row: dict) -> str:
+    raw = json.dumps([row["uploaded_at"].isoformat(), row["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_attachment_cursor(cursor: str):
+    try:
+        uploaded_at, attachment_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(uploaded_at), int(attachment_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _attachment_row(job_id: int, upload: dict, uploaded_by_ip_id: int, now: datetime) -> dict:
+    return {
+        "job_id": job_id,
+        "s3_key": upload["key"],
+        "file_url": upload["file_url"],
+        "filename": upload.get("filename"),
+        "content_type": upload.get("content_type"),
+        "size": upload.get("size"),
+        "uploaded_by_ip_id": uploaded_by_ip_id,
+        "uploaded_at": now
+    }
+
+def add_job_attachments(db: Session, job_id: int, uploads: list, uploaded_by_ip_id: int = None):
+    """Record uploaded files for a job with a single batched INSERT"""
+    if not uploads:
+        return 0
+    try:
+        now = datetime.utcnow()
+        db.execute(insert(JobAttachment), [
+            _attachment_row(job_id, upload, uploaded_by_ip_id, now) for upload in uploads
+        ])
+        db.commit()
+        return len(uploads)
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error saving attachments: {str(e)}")
+
+def _attachment_by_key(db: Session, job_id: int, s3_key: str):
+    row = db.query(*ATTACHMENT_COLUMNS).filter(
+        JobAttachment.job_id == job_id, JobAttachment.s3_key == s3_key
+    ).first()
+    return row._asdict() if row else None
+
+def record_job_attachment(db: Session, job_id: int, upload: dict, uploaded_by_ip_id: int = None) -> dict:
+    """
+    Record one uploaded file (presigned upload confirm) exactly once: a repeated or
+    concurrent call for the same key returns the row that is already there
+    """
+    try:
+        attachment = _attachment_by_key(db, job_id, upload["key"])
+        if attachment is None:
+            try:
+                db.execute(insert(JobAttachment).values(
+                    **_attachment_row(job_id, upload, uploaded_by_ip_id, datetime.utcnow())
+                ))
+                db.commit()
+            except IntegrityError:
+                # Lost the race on (job_id, s3_key) to a concurrent confirm
+                db.rollback()
+            attachment = _attachment_by_key(db, job_id, upload["key"])
+        return attachment
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error saving attachment: {str(e)}")
+
+def list_job_attachments(db: Session, job_id: int, cursor: str = None, limit: int = 50):
+    """Newest-first page of a job's attachments as plain dicts (served by the (job_id, uploaded_at) index)"""
+    try:
+        query = db.query(*ATTACHMENT_COLUMNS).filter(JobAttachment.job_id == job_id)
+        if cursor:
+            query = query.filter(
+                tuple_(JobAttachment.uploaded_at, JobAttachment.id) < decode_attachment_cursor(cursor)
+            )
+        rows = query.order_by(JobAttachment.uploaded_at.desc(), JobAttachment.id.desc()).limit(limit)
+        return [row._asdict() for row in rows]
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching attachments: {str(e)}")
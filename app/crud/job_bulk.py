@@ -0,0 +1,179 @@
+"""
+Bulk job import (JSON rows / CSV) and bulk start/pause/finish.
+
+Imports validate every row, check all referenced IPs with one query, and insert
+jobs and their "created" status logs with one executemany each; rows that fail
+are reported with their row number instead of failing the whole import.
+"""
+import csv
+import io
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.model.job import Job
+from app.model.ip import ip
+from app.model.job_status_log import JobStatusLog
+from app.schemas.job import JobCreate
+from app.crud.job import apply_start, apply_pause, apply_finish
+from app.crud.rollup import apply_rollup_delta, job_payout
+from app.core.events import job_events, job_change
+
+TRANSITIONS = {"start": apply_start, "pause": apply_pause, "finish": apply_finish}
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+
+
+def validate_job_rows(rows: list, first_row: int = 1):
+    """Validate raw rows; returns ([(row number, JobCreate)], [{row, error}])"""
+    valid, errors = [], []
+    for number, raw in enumerate(rows, start=first_row):
+        try:
+            valid.append((number, JobCreate.model_validate(raw)))
+        except ValidationError as e:
+            errors.append({"row": number, "error": _validation_message(e)})
+    return valid, errors
+
+
+def create_jobs_bulk(db: Session, rows: list, first_row: int = 1) -> dict:
+    """Create jobs from raw rows in one transaction; invalid rows are skipped and reported"""
+    valid, errors = validate_job_rows(rows, first_row)
+
+    # One set-based availability check for every IP the batch references
+    ip_ids = {job.assigned_ip_id for _, job in valid if job.assigned_ip_id}
+    ip_assigned = dict(db.execute(select(ip.id, ip.is_assigned).where(ip.id.in_(ip_ids))).all()) if ip_ids else {}
+
+    accepted = []
+    for number, job in valid:
+        if job.assigned_ip_id and job.assigned_ip_id not in ip_assigned:
+            errors.append({"row": number, "error": f"IP with ID {job.assigned_ip_id} not found"})
+        elif job.assigned_ip_id and ip_assigned[job.assigned_ip_id]:
+            errors.append({"row": number, "error": f"IP {job.assigned_ip_id} is already assigned to another job"})
+        else:
+            accepted.append(job)
+
+    job_ids = []
+    try:
+        if accepted:
+            # Unordered RETURNING keeps this one batched statement on every backend;
+            # the status logs only need the set of new ids
+            job_ids = sorted(db.execute(
+                insert(Job).returning(Job.id),
+                [{**job.model_dump(), "status": "created"} for job in accepted]
+            ).scalars())
+
+            now = datetime.utcnow()
+            db.execute(insert(JobStatusLog), [
+                {"job_id": job_id, "status": "created", "timestamp": now, "notes": "Job created"}
+                for job_id in job_ids
+            ])
+
+            # One rollup update per (day, ip) bucket instead of one per job
+            buckets = defaultdict(lambda: [0, Decimal(0)])
+            for job in accepted:
+                bucket = buckets[(job.delivery_date, "created", job.assigned_ip_id)]
+                bucket[0] += 1
+                bucket[1] += job_payout(job)
+            for (day, status, ip_id), (count, payout) in buckets.items():
+                apply_rollup_delta(db, day, status, ip_id, count, payout)
+
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error importing jobs: {str(e)}")
+
+    if job_ids:
+        assigned = db.execute(select(Job.id, Job.assigned_ip_id).where(Job.id.in_(job_ids)).order_by(Job.id)).all()
+        job_events.publish("bulk_create", [
+            {"job_id": job_id, "status": "created", "previous_status": None, "ip_id": ip_id}
+            for job_id, ip_id in assigned
+        ])
+
+    errors.sort(key=lambda error: error["row"])
+    return {"created": len(job_ids), "job_ids": job_ids, "errors": errors}
+
+
+def _csv_rows(file):
+    """Raw CSV records of an upload, read incrementally; the upload itself is left open"""
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    try:
+        yield from csv.DictReader(text)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    finally:
+        # Leave the underlying upload open; the framework closes it
+        text.detach()
+
+
+def count_csv_job_rows(file) -> int:
+    """Data rows in a CSV upload (quoted newlines counted correctly); rewinds the file"""
+    try:
+        return sum(1 for _ in _csv_rows(file))
+    finally:
+        file.seek(0)
+
+
+def iter_csv_job_batches(file, batch_size: int):
+    """
+    Read a CSV upload (header row = JobCreate field names) incrementally and
+    yield (first row number, rows) batches; empty cells become None.
+    """
+    batch, first_row = [], 1
+    for number, raw in enumerate(_csv_rows(file), start=1):
+        batch.append({
+            key.strip(): (value.strip() or None) if isinstance(value, str) else value
+            for key, value in raw.items() if key is not None
+        })
+        if len(batch) >= batch_size:
+            yield first_row, batch
+            batch, first_row = [], number + 1
+    if batch:
+        yield first_row, batch
+
+
+def transition_jobs_bulk(db: Session, action: str, job_ids: list, notes: str = None) -> dict:
+    """
+    Start / pause / finish many jobs in one transaction. Each job runs in its own
+    savepoint, so one invalid transition is reported without undoing the others.
+    """
+    apply = TRANSITIONS.get(action)
+    if apply is None:
+        raise HTTPException(status_code=400, detail=f"Unknown action: {action}")
+
+    ids = list(dict.fromkeys(job_ids))
+    results, changes = [], []
+    try:
+        # Lock in id order so concurrent bulk calls can't deadlock each other
+        jobs = {
+            job.id: job
+            for job in db.query(Job).filter(Job.id.in_(ids)).order_by(Job.id).with_for_update()
+        }
+
+        for job_id in ids:
+            db_job = jobs.get(job_id)
+            if db_job is None:
+                results.append({"job_id": job_id, "ok": False, "error": f"Job with ID {job_id} not found"})
+                continue
+            previous_status = db_job.status
+            try:
+                with db.begin_nested():
+                    apply(db, db_job, notes)
+                results.append({"job_id": job_id, "ok": True, "status": db_job.status})
+                changes.append(job_change(db_job, previous_status))
+            except HTTPException as e:
+                results.append({"job_id": job_id, "ok": False, "error": e.detail})
+
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error in bulk {action}: {str(e)}")
+
+    job_events.publish(f"bulk_{action}", changes)
+
+    succeeded = sum(1 for result in results if result["ok"])
+    return {"succeeded": succeeded, "failed": len(results) - succeeded, "results": results}
@@ -0,0 +1,135 @@
+"""
+Job active / pause time derived from the status log (hot + archived rows).
+
+One windowed pass turns each job's ordered log into segments: every row runs
+until the next row's timestamp (LEAD over (timestamp, id) per job), and segment
+lengths are summed per status in the same statement. Results are stored in
+job_duration_stats.
+
+`refresh_job_durations` is incremental: it looks at log rows past the highest
+log id already processed (minus a lookback, because ids from concurrent
+transactions can commit out of order) and recomputes only the jobs whose log
+has a newer row than their stats. It runs in the background
+(app/services/job_duration_refresher.py) and on POST
+/analytics/job-durations/refresh; the read endpoints never write.
+"""
+from datetime import datetime
+from sqlalchemy import and_, case, delete, func, insert, select, text, union, union_all
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.config import settings
+from app.model.job_status_log import JobStatusLog
+from app.model.job_status_log_archive import JobStatusLogArchive
+from app.model.job_duration_stats import JobDurationStats
+
+# Arbitrary constant so concurrent refreshes don't insert the same jobs twice
+REFRESH_LOCK_ID = 7310422
+
+OPEN_STATUSES = ("in_progress", "paused")
+
+
+def seconds_between(dialect: str, start, end):
+    """SQL expression for (end - start) in seconds"""
+    if dialect == "postgresql":
+        return func.extract("epoch", end - start)
+    return (func.julianday(end) - func.julianday(start)) * 86400.0
+
+def live_seconds(dialect: str, status: str, closed_column, now: datetime):
+    """Stored seconds in `status` plus the still-open segment up to now"""
+    return closed_column + case(
+        (JobDurationStats.open_status == status, seconds_between(dialect, JobDurationStats.open_since, now)),
+        else_=0
+    )
+
+def _duration_rows(db: Session, job_ids: list) -> list:
+    """Single windowed pass over the status log of these jobs; one row per job"""
+    logs = union_all(*(
+        select(model.id, model.job_id, model.status, model.timestamp).where(model.job_id.in_(job_ids))
+        for model in (JobStatusLog, JobStatusLogArchive)
+    )).subquery()
+    segments = select(
+        logs.c.id,
+        logs.c.job_id,
+        logs.c.status,
+        logs.c.timestamp,
+        func.lead(logs.c.timestamp).over(
+            partition_by=logs.c.job_id, order_by=(logs.c.timestamp, logs.c.id)
+        ).label("next_timestamp")
+    ).subquery()
+
+    dialect = db.get_bind().dialect.name
+    length = seconds_between(dialect, segments.c.timestamp, segments.c.next_timestamp)
+    closed = segments.c.next_timestamp.isnot(None)
+    still_open = and_(segments.c.next_timestamp.is_(None), segments.c.status.in_(OPEN_STATUSES))
+
+    def closed_seconds(status: str):
+        return func.coalesce(func.sum(case((and_(closed, segments.c.status == status), length), else_=0)), 0)
+
+    query = select(
+        segments.c.job_id,
+        closed_seconds("in_progress").label("active_seconds"),
+        closed_seconds("paused").label("paused_seconds"),
+        func.sum(case((segments.c.status == "paused", 1), else_=0)).label("pause_count"),
+        func.max(case((still_open, segments.c.status))).label("open_status"),
+        func.max(case((still_open, segments.c.timestamp))).label("open_since"),
+        func.min(case((segments.c.status == "in_progress", segments.c.timestamp))).label("first_started_at"),
+        func.max(case((segments.c.status == "completed", segments.c.timestamp))).label("completed_at"),
+        func.max(segments.c.id).label("last_log_id"),
+    ).group_by(segments.c.job_id)
+    return [row._asdict() for row in db.execute(query)]
+
+def _changed_job_ids(db: Session) -> list:
+    """Jobs with log rows newer than their stats (all jobs with a log on the first run)"""
+    watermark = db.execute(select(func.max(JobDurationStats.last_log_id))).scalar()
+    if watermark is None:
+        return list(db.execute(union(select(JobStatusLog.job_id), select(JobStatusLogArchive.job_id))).scalars())
+
+    floor = watermark - settings.JOB_DURATION_REFRESH_LOOKBACK_IDS
+    newest = dict(db.execute(
+        select(JobStatusLog.job_id, func.max(JobStatusLog.id))
+        .where(JobStatusLog.id > floor)
+        .group_by(JobStatusLog.job_id)
+    ).all())
+    if not newest:
+        return []
+    processed = dict(db.execute(
+        select(JobDurationStats.job_id, JobDurationStats.last_log_id)
+        .where(JobDurationStats.job_id.in_(newest))
+    ).all())
+    return [job_id for job_id, log_id in newest.items() if processed.get(job_id, 0) < log_id]
+
+def refresh_job_durations(db: Session, full: bool = False, wait: bool = True) -> dict:
+    """
+    Recompute stats for jobs whose log changed since the last run (or all, with full=True).
+    With wait=False, returns without refreshing if another refresh holds the lock.
+    """
+    try:
+        if not full and not _changed_job_ids(db):
+            return {"jobs_refreshed": 0}
+
+        if db.get_bind().dialect.name == "postgresql":
+            if wait:
+                db.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": REFRESH_LOCK_ID})
+            elif not db.execute(text("SELECT pg_try_advisory_xact_lock(:lock_id)"), {"lock_id": REFRESH_LOCK_ID}).scalar():
+                db.rollback()
+                return {"jobs_refreshed": 0}
+
+        if full:
+            db.execute(delete(JobDurationStats))
+        # Re-read under the lock: a concurrent refresh may have done part of the work
+        job_ids = sorted(set(_changed_job_ids(db)))
+
+        now = datetime.utcnow()
+        batch_size = settings.JOB_DURATION_REFRESH_BATCH_SIZE
+        for start in range(0, len(job_ids), batch_size):
+            batch = job_ids[start:start + batch_size]
+            rows = _duration_rows(db, batch)
+            db.execute(delete(JobDurationStats).where(JobDurationStats.job_id.in_(batch)))
+            if rows:
+                db.execute(insert(JobDurationStats), [{**row, "updated_at": now} for row in rows])
+
+        db.commit()
+        return {"jobs_refreshed": len(job_ids)}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error refreshing job durations: {str(e)}")
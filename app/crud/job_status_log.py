@@ -0,0 +1,124 @@
+"""
+Job status log reads across the hot table and its archive, and the archival job.
+
+New log rows are only ever appended to job_status_log. `archive_status_logs`
+moves rows older than STATUS_LOG_ARCHIVE_AFTER_DAYS into job_status_log_archive
+in batches, so the hot table and its indexes stay sized to recent activity and
+appends stay cheap. History reads page through both tables in (timestamp, id)
+order, so a read costs one page no matter how long the history is.
+"""
+import base64
+import json
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, insert, select, text, tuple_, union_all
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.config import settings
+from app.model.job_status_log import JobStatusLog
+from app.model.job_status_log_archive import JobStatusLogArchive
+
+
+def _log_columns(model):
+    return (model.id, model.job_id, model.status, model.timestamp, model.notes)
+
+def encode_status_log_cursor(row: dict) -> str:
+    raw = json.dumps([row["timestamp"].isoformat(), row["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_status_log_cursor(cursor: str):
+    try:
+        timestamp, log_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _history_branch(model, job_id: int, since: datetime, until: datetime, after, limit: int):
+    query = select(*_log_columns(model)).where(model.job_id == job_id)
+    if since:
+        query = query.where(model.timestamp >= since)
+    if until:
+        query = query.where(model.timestamp < until)
+    if after:
+        query = query.where(tuple_(model.timestamp, model.id) > after)
+    if limit:
+        # Each branch stops after one page on its (job_id, timestamp) index
+        query = query.order_by(model.timestamp, model.id).limit(limit)
+    return select(query.subquery())
+
+def get_status_log_page(
+    db: Session,
+    job_id: int,
+    since: datetime = None,
+    until: datetime = None,
+    cursor: str = None,
+    limit: int = None
+):
+    """Oldest-first log rows of a job (hot + archived) as plain dicts; limit=None reads everything"""
+    after = decode_status_log_cursor(cursor) if cursor else None
+    branches = union_all(
+        _history_branch(JobStatusLogArchive, job_id, since, until, after, limit),
+        _history_branch(JobStatusLog, job_id, since, until, after, limit),
+    ).subquery()
+    query = select(branches).order_by(branches.c.timestamp, branches.c.id)
+    if limit:
+        query = query.limit(limit)
+    return [row._asdict() for row in db.execute(query)]
+
+def _ensure_archive_partitions(db: Session, timestamps):
+    """Create the monthly PostgreSQL partitions these rows fall into (no-op elsewhere)"""
+    if db.get_bind().dialect.name != "postgresql":
+        return
+    for year, month in sorted({(ts.year, ts.month) for ts in timestamps}):
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS job_status_log_archive_{year}{month:02d} "
+            f"PARTITION OF job_status_log_archive FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+
+def archive_status_logs(db: Session, older_than_days: int = None, max_batches: int = None) -> dict:
+    """
+    Move log rows older than the cutoff into the archive, STATUS_LOG_ARCHIVE_BATCH_SIZE
+    rows per transaction. Each batch is written in (job_id, timestamp) order so a
+    job's archived history sits together. `remaining` is True when max_batches ran
+    out before the cutoff was reached - call again to continue.
+    """
+    older_than_days = settings.STATUS_LOG_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    max_batches = settings.STATUS_LOG_ARCHIVE_MAX_BATCHES if max_batches is None else max_batches
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    archived, batches = 0, 0
+
+    try:
+        while batches < max_batches:
+            # Range scan on the (timestamp, id) index, oldest first, stopping after one batch.
+            # Locked so a concurrent delete_job either waits for us or removes them first.
+            rows = [row._asdict() for row in db.execute(
+                select(*_log_columns(JobStatusLog))
+                .where(JobStatusLog.timestamp < cutoff)
+                .order_by(JobStatusLog.timestamp, JobStatusLog.id)
+                .limit(settings.STATUS_LOG_ARCHIVE_BATCH_SIZE)
+                .with_for_update()
+            )]
+            if not rows:
+                break
+
+            _ensure_archive_partitions(db, [row["timestamp"] for row in rows])
+            rows.sort(key=lambda row: (row["job_id"], row["timestamp"], row["id"]))
+            db.execute(insert(JobStatusLogArchive), rows)
+            db.execute(
+                delete(JobStatusLog).where(JobStatusLog.id.in_([row["id"] for row in rows])),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+
+            archived += len(rows)
+            batches += 1
+            if len(rows) < settings.STATUS_LOG_ARCHIVE_BATCH_SIZE:
+                break
+        else:
+            return {"archived": archived, "batches": batches, "cutoff": cutoff, "remaining": True}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Error archiving status logs: {str(e)}")
+
+    return {"archived": archived, "batches": batches, "cutoff": cutoff, "remaining": False}
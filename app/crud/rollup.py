@@ -0,0 +1,100 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func
+from decimal import Decimal
+from app.model.job import Job
+from sqlalchemy.dialects import postgresql, sqlite
+from app.model.job_daily_rollup import JobDailyRollup, UNASSIGNED_IP
+from app.core.response_cache import mark_analytics_changed
+
+
+# Dialect INSERTs that support ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def job_payout(job: Job) -> Decimal:
+    """Payout of a single job = rate * size (size defaults to 0)"""
+    return Decimal(job.rate or 0) * (job.size or 0)
+
+
+def job_rollup_key(job: Job):
+    """Rollup bucket a job currently falls into"""
+    return (job.delivery_date, job.status, job.assigned_ip_id)
+
+
+def apply_rollup_delta(db: Session, day, status: str, assigned_ip_id, count: int, payout: Decimal):
+    """Add count/payout to one rollup bucket inside the caller's transaction (no commit)"""
+    if day is None or not count:
+        return
+    mark_analytics_changed(db)
+
+    values = {
+        "day": day,
+        "status": status,
+        "assigned_ip_id": UNASSIGNED_IP if assigned_ip_id is None else assigned_ip_id,
+        "job_count": count,
+        "total_payout": payout,
+    }
+    # One atomic upsert: concurrent first writes to a bucket add up instead of
+    # colliding on the unique index, and increments never overwrite each other
+    statement = UPSERT_INSERTS[db.get_bind().dialect.name](JobDailyRollup).values(**values)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["day", "status", "assigned_ip_id"],
+        set_={
+            "job_count": JobDailyRollup.job_count + statement.excluded.job_count,
+            "total_payout": JobDailyRollup.total_payout + statement.excluded.total_payout,
+        }
+    ))
+
+
+def add_job_to_rollup(db: Session, job: Job):
+    day, status, ip_id = job_rollup_key(job)
+    apply_rollup_delta(db, day, status, ip_id, 1, job_payout(job))
+
+
+def remove_job_from_rollup(db: Session, job: Job):
+    day, status, ip_id = job_rollup_key(job)
+    apply_rollup_delta(db, day, status, ip_id, -1, -job_payout(job))
+
+
+def move_job_in_rollup(db: Session, old_key, old_payout: Decimal, job: Job):
+    """Move a job from its previous bucket to its current one after a status/field change"""
+    new_key = job_rollup_key(job)
+    new_payout = job_payout(job)
+    if old_key == new_key and old_payout == new_payout:
+        return
+    apply_rollup_delta(db, *old_key, -1, -old_payout)
+    apply_rollup_delta(db, *new_key, 1, new_payout)
+
+
+def rebuild_job_rollup(db: Session):
+    """Recompute the whole rollup from the job table (backfill / repair)"""
+    try:
+        db.query(JobDailyRollup).delete(synchronize_session=False)
+        mark_analytics_changed(db)
+
+        ip_bucket = func.coalesce(Job.assigned_ip_id, UNASSIGNED_IP)
+        buckets = db.query(
+            Job.delivery_date,
+            Job.status,
+            ip_bucket.label('assigned_ip_id'),
+            func.count(Job.id).label('job_count'),
+            func.sum(Job.rate * func.coalesce(Job.size, 0)).label('total_payout')
+        ).filter(
+            Job.delivery_date.isnot(None)
+        ).group_by(Job.delivery_date, Job.status, ip_bucket).all()
+
+        db.add_all([
+            JobDailyRollup(
+                day=bucket.delivery_date,
+                status=bucket.status,
+                assigned_ip_id=bucket.assigned_ip_id,
+                job_count=bucket.job_count,
+                total_payout=bucket.total_payout or Decimal(0)
+            )
+            for bucket in buckets
+        ])
+        db.commit()
+        return len(buckets)
+    except Exception:
+        db.rollback()
+        raise
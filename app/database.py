@@ -21,17 +21,41 @@
 
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
+from app.core.db_pool import engine_pool_options
+
+
+# Sync drivers -> their asyncio counterparts
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url() -> str:
+    """Async URL: explicit ASYNC_DATABASE_URL, else DATABASE_URL with an asyncio driver"""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    url = make_url(settings.DATABASE_URL)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
 
 
 # ✅ Define the SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_pool_options("sync"))
+
+# ✅ Async engine for non-blocking (async def) routes
+async_engine = create_async_engine(get_async_database_url(), **engine_pool_options("async", is_async=True))
 
 # ✅ Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# ✅ Async session factory - objects stay readable after commit (no lazy refresh outside a greenlet)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 # ✅ Declarative base for models
 Base = declarative_base()
 
@@ -42,3 +66,9 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# ✅ Async dependency for async def routes
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,22 +1,44 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.migrations import run_migrations
 from app.api.v1 import auth, verification, jobs
 
 from app.routes.auth import router as auth_router
 from app.routes.approval import router as approval_router
 from app.routes.job import router as job_router
 from app.routes.analytics import router as analytics_router
+from app.routes.metrics import router as metrics_router
+from app.routes.health import router as health_router
+from app.services.http_client import close_http_clients
+from app.services.otp_dispatcher import otp_dispatcher
+from app.services.job_duration_refresher import job_duration_refresher
+from app.core.query_stats import query_stats_middleware
+from app.core.http_metrics import http_metrics_middleware
 
 
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Create / upgrade database schema
+run_migrations()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Deliver queued OTPs, including ones left pending by a previous process
+    otp_dispatcher.start()
+    # Keep job duration stats current so the analytics reads never write
+    job_duration_refresher.start()
+    yield
+    job_duration_refresher.stop()
+    otp_dispatcher.stop()
+    # Release pooled outbound connections (Attestr etc.)
+    await close_http_clients()
+
 
 app = FastAPI(
     title="Partner App API",
     description="User Registration and Verification System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS Middleware
@@ -28,6 +50,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-request SQL statement counts, N+1 detection and query budgets
+app.middleware("http")(query_stats_middleware)
+# Route latency / status / in-flight metrics (outermost, so it times everything above)
+app.middleware("http")(http_metrics_middleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(verification.router, prefix="/api/v1")
@@ -36,6 +63,8 @@ app.include_router(auth_router)
 app.include_router(approval_router)
 app.include_router(job_router)
 app.include_router(analytics_router)
+app.include_router(metrics_router)
+app.include_router(health_router)
 
 
 @app.get("/")
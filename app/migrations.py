@@ -0,0 +1,241 @@
+"""
+Versioned schema migrations.
+
+Replaces the old `Base.metadata.create_all` at startup: every step runs once,
+in order, and is recorded in `schema_migrations`. Steps must be idempotent
+(checkfirst) so databases created by the old create_all path upgrade cleanly.
+
+Usage:
+    python -m app.migrations upgrade       # apply pending steps
+    python -m app.migrations check-plans   # fail if a hot query needs a sequential scan
+"""
+import sys
+from datetime import datetime, date
+from sqlalchemy import MetaData, Table, Column, Integer, String, DateTime, inspect, select, insert, text, tuple_
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.database import engine, Base
+# Import every model so Base.metadata is complete before create_all
+from app.model.ip import ip
+from app.model.job import Job
+from app.model.job_status_log import JobStatusLog
+from app.model.job_status_log_archive import JobStatusLogArchive
+from app.model.job_duration_stats import JobDurationStats
+from app.model.job_daily_rollup import JobDailyRollup
+from app.model.job_attachment import JobAttachment
+from app.model.otp_outbox import OtpOutbox
+from app.model.otp_code import OtpCode
+from app.model.user import User
+from app.crud.rollup import rebuild_job_rollup
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# Arbitrary constant so concurrent workers don't run the same step twice
+MIGRATION_LOCK_ID = 7310421
+
+
+def _create_base_tables(conn: Connection):
+    Base.metadata.create_all(bind=conn)
+
+
+def _create_indexes(*indexes):
+    def step(conn: Connection):
+        for index in indexes:
+            index.create(bind=conn, checkfirst=True)
+    return step
+
+
+def _create_tables(*models):
+    def step(conn: Connection):
+        for model in models:
+            model.__table__.create(bind=conn, checkfirst=True)
+    return step
+
+
+def _add_columns(model, *names):
+    def step(conn: Connection):
+        table = model.__table__
+        existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+        for name in names:
+            if name not in existing:
+                column_type = table.c[name].type.compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+    return step
+
+
+def _unique_job_attachment_keys(conn: Connection):
+    # Drop duplicates left by racing upload confirms (keeping the first) so the index can be built
+    conn.execute(text(
+        "DELETE FROM job_attachment WHERE id NOT IN "
+        "(SELECT MIN(id) FROM job_attachment GROUP BY job_id, s3_key)"
+    ))
+    _index(JobAttachment, "ix_job_attachment_job_id_s3_key").create(bind=conn, checkfirst=True)
+
+
+def _rebuild_job_rollup(conn: Connection):
+    # Backfills the rollup for jobs created before it existed (and re-buckets
+    # unassigned jobs under UNASSIGNED_IP); joins the migration transaction
+    with Session(bind=conn) as db:
+        rebuild_job_rollup(db)
+
+
+def _index(model, name: str):
+    return next(index for index in model.__table__.indexes if index.name == name)
+
+
+MIGRATIONS = [
+    (1, "base tables", _create_base_tables),
+    (2, "job and status log hot-path indexes", _create_indexes(
+        _index(Job, "ix_job_delivery_date_status"),
+        _index(Job, "ix_job_assigned_ip_id_status"),
+        _index(JobStatusLog, "ix_job_status_log_job_id_timestamp"),
+    )),
+    (3, "job list keyset pagination indexes", _create_indexes(
+        _index(Job, "ix_job_delivery_date_id"),
+        _index(Job, "ix_job_status_delivery_date_id"),
+        _index(Job, "ix_job_city_delivery_date_id"),
+        _index(Job, "ix_job_type_delivery_date_id"),
+    )),
+    (4, "job attachments", _create_tables(JobAttachment)),
+    (5, "otp outbox", _create_tables(OtpOutbox)),
+    (6, "job status log archive", _create_tables(JobStatusLogArchive)),
+    (7, "job duration stats", _create_tables(JobDurationStats)),
+    (8, "backfill job daily rollup", _rebuild_job_rollup),
+    (9, "otp codes", _create_tables(OtpCode)),
+    (10, "otp outbox dispatch tokens", _add_columns(OtpOutbox, "dispatch_token")),
+    (11, "otp outbox token and phone indexes", _create_indexes(
+        _index(OtpOutbox, "ix_otp_outbox_dispatch_token"),
+        _index(OtpOutbox, "ix_otp_outbox_phone_number_status"),
+    )),
+    (12, "status log archival index", _create_indexes(
+        _index(JobStatusLog, "ix_job_status_log_timestamp_id"),
+    )),
+    (13, "unique job attachment keys", _unique_job_attachment_keys),
+]
+
+
+def run_migrations(bind: Engine = engine) -> list:
+    """Apply pending migrations in order; returns the versions that were applied"""
+    applied_now = []
+    with bind.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": MIGRATION_LOCK_ID})
+
+        schema_migrations.create(bind=conn, checkfirst=True)
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+        for version, description, step in MIGRATIONS:
+            if version in applied:
+                continue
+            step(conn)
+            conn.execute(insert(schema_migrations).values(
+                version=version,
+                description=description,
+                applied_at=datetime.utcnow()
+            ))
+            applied_now.append(version)
+            print(f"✅ Applied migration {version}: {description}")
+
+    return applied_now
+
+
+# Queries on the request hot path; each must be answerable from an index
+HOT_QUERIES = {
+    "dashboard jobs by assigned IP": select(Job.id).where(Job.assigned_ip_id == 1),
+    "jobs by delivery date range": select(Job.id).where(
+        Job.delivery_date >= date(2024, 1, 1),
+        Job.delivery_date <= date(2024, 12, 31)
+    ),
+    "job list page by status": select(Job.id).where(
+        Job.status == "created",
+        tuple_(Job.delivery_date, Job.id) > (date(2024, 1, 1), 1)
+    ).order_by(Job.delivery_date, Job.id).limit(100),
+    "job list page by city": select(Job.id).where(
+        Job.city == "Bengaluru",
+        tuple_(Job.delivery_date, Job.id) > (date(2024, 1, 1), 1)
+    ).order_by(Job.delivery_date, Job.id).limit(100),
+    "job status history": select(JobStatusLog.id).where(
+        JobStatusLog.job_id == 1
+    ).order_by(JobStatusLog.timestamp.asc()),
+    "archived job status history": select(JobStatusLogArchive.id).where(
+        JobStatusLogArchive.job_id == 1
+    ).order_by(JobStatusLogArchive.timestamp, JobStatusLogArchive.id).limit(500),
+    "job log rows since duration watermark": select(JobStatusLog.job_id).where(
+        JobStatusLog.id > 1000
+    ),
+    "job attachments page": select(JobAttachment.id).where(
+        JobAttachment.job_id == 1
+    ).order_by(JobAttachment.uploaded_at.desc()).limit(50),
+    "due otp sends": select(OtpOutbox.id).where(
+        OtpOutbox.status.in_(("pending", "sending")),
+        OtpOutbox.next_attempt_at <= datetime(2024, 1, 1)
+    ),
+    "otp sends superseded by a new code": select(OtpOutbox.id).where(
+        OtpOutbox.phone_number == "910000000000",
+        OtpOutbox.status.in_(("pending", "sending"))
+    ),
+    "status log rows due for archival": select(JobStatusLog.id).where(
+        JobStatusLog.timestamp < datetime(2024, 1, 1)
+    ).order_by(JobStatusLog.timestamp, JobStatusLog.id).limit(1000),
+    "otp status by dispatch token": select(OtpOutbox.id).where(OtpOutbox.dispatch_token == "token"),
+    "rollup by period": select(JobDailyRollup.id).where(
+        JobDailyRollup.day >= date(2024, 1, 1),
+        JobDailyRollup.day <= date(2024, 12, 31)
+    ),
+}
+
+
+def _sequential_scans(conn: Connection, statement) -> list:
+    """Return the plan lines that read a whole table instead of using an index"""
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+
+    if conn.dialect.name == "postgresql":
+        # Small tables always seq scan; disabling it shows whether an index *can* be used
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = [row[0] for row in conn.execute(text(f"EXPLAIN {sql}"))]
+        return [line.strip() for line in plan if "Seq Scan" in line]
+
+    if conn.dialect.name == "sqlite":
+        plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+        return [line for line in plan if line.startswith("SCAN ") and "USING" not in line]
+
+    raise RuntimeError(f"Plan check is not supported for dialect {conn.dialect.name}")
+
+
+def check_query_plans(bind: Engine = engine) -> dict:
+    """EXPLAIN every hot query; returns {query name: offending plan lines} for failures"""
+    failures = {}
+    # Plain connect(): the planner settings are rolled back when the connection closes
+    with bind.connect() as conn:
+        for name, statement in HOT_QUERIES.items():
+            scans = _sequential_scans(conn, statement)
+            if scans:
+                failures[name] = scans
+    return failures
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+
+    if command == "upgrade":
+        versions = run_migrations()
+        print(f"Schema up to date ({len(versions)} migration(s) applied)")
+    elif command == "check-plans":
+        failures = check_query_plans()
+        for name, scans in failures.items():
+            print(f"❌ {name}: {'; '.join(scans)}")
+        if failures:
+            sys.exit(1)
+        print("✅ All hot queries use an index")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(2)
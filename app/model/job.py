@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, Numeric, Date
+from sqlalchemy import Column, Integer, String, Boolean, Numeric, Date, Index
 from sqlalchemy.orm import  Mapped, mapped_column
 from app.database import Base
 from decimal import Decimal
@@ -23,6 +23,17 @@ class Job(Base):
     checklist_link: Mapped[str] = mapped_column(String, nullable=True)
     google_map_link: Mapped[str] = mapped_column(String, nullable=True) 
     
+    # Hot-path filters: analytics/date ranges and partner dashboards (assigned IP)
+    __table_args__ = (
+        Index("ix_job_delivery_date_status", "delivery_date", "status"),
+        Index("ix_job_assigned_ip_id_status", "assigned_ip_id", "status"),
+        # Keyset pagination of GET /jobs in (delivery_date, id) order, per filter
+        Index("ix_job_delivery_date_id", "delivery_date", "id"),
+        Index("ix_job_status_delivery_date_id", "status", "delivery_date", "id"),
+        Index("ix_job_city_delivery_date_id", "city", "delivery_date", "id"),
+        Index("ix_job_type_delivery_date_id", "type", "delivery_date", "id"),
+    )
+    
     
     def __repr__(self):
         return f"<Job {self.name}>"
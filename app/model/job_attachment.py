@@ -0,0 +1,23 @@
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+class JobAttachment(Base):
+    __tablename__ = "job_attachment"
+    
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True, autoincrement=True)
+    job_id: Mapped[int] = mapped_column(Integer, ForeignKey("job.id"), nullable=False)
+    s3_key: Mapped[str] = mapped_column(String, nullable=False)
+    file_url: Mapped[str] = mapped_column(String, nullable=False)
+    filename: Mapped[str] = mapped_column(String, nullable=True)
+    content_type: Mapped[str] = mapped_column(String, nullable=True)
+    size: Mapped[int] = mapped_column(Integer, nullable=True)
+    uploaded_by_ip_id: Mapped[int] = mapped_column(Integer, nullable=True)
+    uploaded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_job_attachment_job_id_uploaded_at", "job_id", "uploaded_at"),
+        # A file is attached to a job once, however often its upload is confirmed
+        Index("ix_job_attachment_job_id_s3_key", "job_id", "s3_key", unique=True),
+    )
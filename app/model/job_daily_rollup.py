@@ -0,0 +1,28 @@
+from sqlalchemy import Integer, String, Numeric, Date, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+from decimal import Decimal
+from datetime import date
+
+
+UNASSIGNED_IP = 0
+
+
+class JobDailyRollup(Base):
+    """Pre-aggregated job counts and payout per delivery day x status x assigned IP"""
+    __tablename__ = "job_daily_rollup"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    # UNASSIGNED_IP (0) for jobs without an IP, so the unique index covers that bucket too
+    assigned_ip_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    job_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    total_payout: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_job_daily_rollup_day_status_ip", "day", "status", "assigned_ip_id", unique=True),
+    )
+
+    def __repr__(self):
+        return f"<JobDailyRollup {self.day} {self.status} ip={self.assigned_ip_id}>"
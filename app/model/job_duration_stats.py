@@ -0,0 +1,30 @@
+from sqlalchemy import Integer, String, Float, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+
+class JobDurationStats(Base):
+    """
+    Per-job time in progress / paused, derived from the status log. Closed
+    segments are summed here; the open one (job currently in progress or paused)
+    is kept as open_status / open_since and added at read time, so the figures
+    stay live without rewriting rows.
+    """
+    __tablename__ = "job_duration_stats"
+
+    job_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    active_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    paused_seconds: Mapped[float] = mapped_column(Float, nullable=False, default=0)
+    pause_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    open_status: Mapped[str | None] = mapped_column(String, nullable=True)
+    open_since: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    first_started_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    completed_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    # Newest status log row included; jobs whose log has a newer row are recomputed
+    last_log_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_job_duration_stats_last_log_id", "last_log_id"),
+    )
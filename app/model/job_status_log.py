@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, DateTime, ForeignKey
+from sqlalchemy import Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
 from datetime import datetime
 from app.database import Base
@@ -10,4 +10,10 @@ class JobStatusLog(Base):
     job_id: Mapped[int] = mapped_column(Integer, ForeignKey("job.id"), nullable=False)
     status: Mapped[str] = mapped_column(String, nullable=False)
     timestamp: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
-    notes: Mapped[str] = mapped_column(String, nullable=True)
\ No newline at end of file
+    notes: Mapped[str] = mapped_column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_status_log_job_id_timestamp", "job_id", "timestamp"),
+        # Archival walks the oldest rows first (archive_status_logs)
+        Index("ix_job_status_log_timestamp_id", "timestamp", "id"),
+    )
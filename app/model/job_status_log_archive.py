@@ -0,0 +1,26 @@
+from sqlalchemy import Integer, String, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+
+class JobStatusLogArchive(Base):
+    """
+    Status log rows moved out of job_status_log once they are older than
+    STATUS_LOG_ARCHIVE_AFTER_DAYS, so the hot table (and its indexes) stays small.
+    On PostgreSQL this is range-partitioned by month; partitions are created by
+    the archival job as it needs them. Rows keep their original id.
+    """
+    __tablename__ = "job_status_log_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    # Part of the key because PostgreSQL requires the partition column in it
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    job_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String, nullable=False)
+    notes: Mapped[str] = mapped_column(String, nullable=True)
+
+    __table_args__ = (
+        Index("ix_job_status_log_archive_job_id_timestamp_id", "job_id", "timestamp", "id"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
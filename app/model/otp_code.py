@@ -0,0 +1,18 @@
+from sqlalchemy import String, DateTime
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+
+class OtpCode(Base):
+    """Pending login OTP per phone (the database OTP store); one row, replaced on resend"""
+    __tablename__ = "otp_code"
+
+    phone_number: Mapped[str] = mapped_column(String, primary_key=True)
+    # HMAC of phone + code, never the code itself
+    code_digest: Mapped[str] = mapped_column(String, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<OtpCode {self.phone_number}>"
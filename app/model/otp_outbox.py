@@ -0,0 +1,37 @@
+import secrets
+from sqlalchemy import Integer, String, DateTime, Index
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from app.database import Base
+
+
+class OtpOutbox(Base):
+    """Durable queue of OTP SMS sends; rows survive restarts until sent or given up on"""
+    __tablename__ = "otp_outbox"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    # Unguessable handle for GET /auth/otp-status (ids are sequential); NULL only on rows older than it
+    dispatch_token: Mapped[str | None] = mapped_column(
+        String, nullable=True, default=lambda: secrets.token_urlsafe(24)
+    )
+    phone_number: Mapped[str] = mapped_column(String, nullable=False)
+    recipient_name: Mapped[str] = mapped_column(String, nullable=False)
+    # Cleared once the send is finished (sent / failed / superseded) so codes don't linger
+    otp_code: Mapped[str | None] = mapped_column(String, nullable=True)
+    # pending / sending / sent / failed / superseded (a newer OTP was requested for the phone)
+    status: Mapped[str] = mapped_column(String, nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Due time for pending rows; lease expiry for rows being sent
+    next_attempt_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.utcnow)
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_otp_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+        Index("ix_otp_outbox_dispatch_token", "dispatch_token", unique=True),
+        Index("ix_otp_outbox_phone_number_status", "phone_number", "status"),
+    )
+
+    def __repr__(self):
+        return f"<OtpOutbox {self.id} {self.status}>"
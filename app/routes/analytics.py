@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.database import get_db
-from app.schemas.analytics import PayoutSummary, JobStageCount, PayoutByIP
-from app.crud.analytics import get_payout_analytics, get_job_stage_summary, get_ip_performance
+from app.database import get_async_db
+from app.schemas.analytics import PayoutSummary, JobStageCount, PayoutByIP, JobDurationSummary, JobDuration
+from app.crud.aio import (
+    get_payout_analytics, get_job_stage_summary, get_ip_performance, rebuild_job_rollup,
+    get_job_duration_analytics, get_job_duration, refresh_job_durations
+)
+from app.crud.analytics import get_date_range
+from app.core.response_cache import analytics_cache
 from app.core.security import get_current_user
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
 @router.get("/payout", response_model=PayoutSummary)
-def get_payout_report(
+async def get_payout_report(
+    request: Request,
     period: str = Query(..., description="Period type: 'week', 'month', 'quarter', or 'year'"),
     year: Optional[int] = Query(None, description="Specific year (optional, defaults to current)"),
     month: Optional[int] = Query(None, ge=1, le=12, description="Specific month (1-12, required for 'month' period with specific year)"),
     quarter: Optional[int] = Query(None, ge=1, le=4, description="Specific quarter (1-4, required for 'quarter' period with specific year)"),
     week: Optional[int] = Query(None, ge=1, le=53, description="Specific week number (1-53, required for 'week' period with specific year)"),
-    db: Session = Depends(get_db),
+    single_pass: bool = Query(False, description="Compute the whole summary from one grouped query"),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(get_current_user)
 ):
     """
@@ -30,35 +37,104 @@ def get_payout_report(
     - Specific quarter: ?period=quarter&year=2024&quarter=2
     - Specific week: ?period=week&year=2024&week=10
     - Specific year: ?period=year&year=2023
+    - Single round trip: ?period=month&single_pass=true
     
     Returns:
     - Total jobs in the period
     - Total payout
     - Job count and payout by status
     - Job count and payout by IP
+    
+    Responses are cached until the next job write and carry an ETag (send If-None-Match for a 304).
     """
-    return get_payout_analytics(db, period, year, month, quarter, week)
+    # Keyed on the resolved dates, so "current month" rolls over with the calendar
+    start_date, end_date = get_date_range(period, year, month, quarter, week)
+    return await analytics_cache.respond(
+        request, "payout", (period, start_date, end_date, single_pass),
+        lambda: get_payout_analytics(db, period, year, month, quarter, week, single_pass=single_pass)
+    )
 
 
 @router.get("/job-stages", response_model=List[JobStageCount])
-def get_job_stages(
-    db: Session = Depends(get_db),
+async def get_job_stages(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(get_current_user)
 ):
     """
     Get current count of jobs in each stage (all time).
     Shows how many jobs are created, in_progress, paused, completed.
+    Cached until the next job write; supports If-None-Match.
     """
-    return get_job_stage_summary(db)
+    return await analytics_cache.respond(request, "job-stages", (), lambda: get_job_stage_summary(db))
 
 
 @router.get("/ip-performance", response_model=List[PayoutByIP])
-def get_all_ip_performance(
-    db: Session = Depends(get_db),
+async def get_all_ip_performance(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(get_current_user)
 ):
     """
     Get performance metrics for all IPs (all time).
     Shows total jobs and total payout per IP.
+    Cached until the next job write; supports If-None-Match.
+    """
+    return await analytics_cache.respond(request, "ip-performance", (), lambda: get_ip_performance(db))
+
+
+@router.get("/job-durations", response_model=JobDurationSummary)
+async def get_job_durations(
+    group_by: str = Query("ip", description="Group by 'ip', 'city', or 'type'"),
+    period: Optional[str] = Query(None, description="Only jobs delivered in this period: 'week', 'month', 'quarter', or 'year' (all time if omitted)"),
+    year: Optional[int] = Query(None, description="Specific year (optional, defaults to current)"),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    quarter: Optional[int] = Query(None, ge=1, le=4),
+    week: Optional[int] = Query(None, ge=1, le=53),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Time jobs actually spent in progress vs paused, and how often they were paused,
+    per IP, city or job type (totals and per-job averages, in seconds).
+    
+    Derived from the job status log by a background refresh every
+    JOB_DURATION_REFRESH_INTERVAL_SECONDS; jobs still running count up to now.
+    """
+    return await get_job_duration_analytics(db, group_by, period, year, month, quarter, week)
+
+
+@router.get("/job-durations/{job_id}", response_model=JobDuration)
+async def get_single_job_duration(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user)
+):
+    """Time in progress / paused and pause count of one job."""
+    return await get_job_duration(db, job_id)
+
+
+@router.post("/job-durations/refresh")
+async def refresh_durations(
+    full: bool = Query(False, description="Recompute every job instead of only changed ones"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Bring job duration stats up to date with the status log now, instead of waiting
+    for the background refresh. full=true repairs stats after manual log fixes.
+    """
+    return await refresh_job_durations(db, full=full)
+
+
+@router.post("/rollup/rebuild")
+async def rebuild_rollup(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Recompute the daily payout rollup from the job table.
+    Run once after deploying the rollup, or to repair drift after manual data fixes.
     """
-    return get_ip_performance(db)
\ No newline at end of file
+    buckets = await rebuild_job_rollup(db)
+    return {"message": "Rollup rebuilt successfully", "buckets": buckets}
@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from app.core.health import readiness
+
+router = APIRouter(prefix="/health", tags=["Health"])
+
+
+@router.get("/live")
+def liveness():
+    """Process is up and serving; never touches dependencies (restart only if this fails)"""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness_check():
+    """
+    Whether this instance should receive traffic: DB reachable through the pool,
+    pool headroom left, and HEALTH_READY_DEPENDENCIES healthy. 503 when degraded.
+    """
+    result = await readiness()
+    return JSONResponse(status_code=200 if result["status"] == "ok" else 503, content=result)
@@ -1,58 +1,259 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
-from app.schemas.job import JobStart,JobPause,JobFinish, JobCreate, JobUpdate, JobResponse
-from app.schemas.job_status_log import JobStatusLogResponse
-from app.crud.job import (
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, Response, UploadFile, File, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Dict, Any, Optional
+from datetime import date, datetime
+from app.database import get_async_db
+from app.schemas.job import (
+    JobStart, JobPause, JobFinish, JobCreate, JobUpdate, JobResponse,
+    BulkJobCreateResponse, BulkJobTransition, BulkJobTransitionResponse
+)
+from app.schemas.job_status_log import JobStatusLogResponse, StatusLogArchiveResponse
+from app.crud.aio import (
     get_job_by_id, get_all_jobs, create_job, update_job, delete_job,
-    start_job, pause_job, finish_job, get_job_status_history
+    start_job, pause_job, finish_job, get_job_status_history,
+    create_jobs_bulk, transition_jobs_bulk, archive_status_logs
 )
-from app.core.security import get_current_user
+from app.crud.job import encode_job_cursor
+from app.crud.job_bulk import iter_csv_job_batches, count_csv_job_rows
+from app.crud.job_status_log import encode_status_log_cursor
+from app.config import settings
+from app.core.security import get_current_user, decode_token_subject
+from app.core.events import job_events
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 
 @router.post("/", response_model=JobResponse, status_code=status.HTTP_201_CREATED)
-def create_new_job(job: JobCreate, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def create_new_job(job: JobCreate, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """Create a new job. Validates that assigned IP has is_assigned=False before assignment."""
-    return create_job(db, job)
+    return await create_job(db, job)
+
+def _check_bulk_size(count: int):
+    if count > settings.BULK_JOB_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_JOB_MAX_ROWS} rows per request"
+        )
+
+@router.post("/bulk", response_model=BulkJobCreateResponse)
+async def create_jobs_in_bulk(rows: List[Dict[str, Any]], db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """
+    Create many jobs from a JSON array of job objects in one transaction.
+    Invalid rows (bad fields, unknown or already-assigned IP) are skipped and listed in errors.
+    """
+    _check_bulk_size(len(rows))
+    return await create_jobs_bulk(db, rows)
+
+@router.post("/bulk/csv", response_model=BulkJobCreateResponse)
+async def import_jobs_csv(file: UploadFile = File(...), db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """
+    Import jobs from a CSV whose header row uses the job field names. The file is
+    read incrementally and committed every BULK_JOB_BATCH_SIZE rows.
+    """
+    # Counted up front (same BULK_JOB_MAX_ROWS limit as /bulk) so an oversized file is
+    # rejected before any batch is committed
+    _check_bulk_size(await run_in_threadpool(count_csv_job_rows, file.file))
+    result = {"created": 0, "job_ids": [], "errors": []}
+    batches = iter_csv_job_batches(file.file, settings.BULK_JOB_BATCH_SIZE)
+    try:
+        # Reading the spooled upload and parsing CSV block, so each batch is pulled in a worker thread
+        while (item := await run_in_threadpool(next, batches, None)) is not None:
+            first_row, batch = item
+            batch_result = await create_jobs_bulk(db, batch, first_row)
+            result["created"] += batch_result["created"]
+            result["job_ids"].extend(batch_result["job_ids"])
+            result["errors"].extend(batch_result["errors"])
+    finally:
+        batches.close()
+    return result
+
+@router.post("/bulk/transition", response_model=BulkJobTransitionResponse)
+async def transition_jobs_in_bulk(request: BulkJobTransition, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """Start, pause or finish many jobs in one transaction; per-job results, failures don't block the rest."""
+    _check_bulk_size(len(request.job_ids))
+    return await transition_jobs_bulk(db, request.action, request.job_ids, request.notes)
+
+@router.post("/status-log/archive", response_model=StatusLogArchiveResponse)
+async def archive_job_status_logs(older_than_days: int = Query(None, ge=0), db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
+    """
+    Move status log rows older than older_than_days (default STATUS_LOG_ARCHIVE_AFTER_DAYS)
+    to the archive table. Bounded per call; repeat while `remaining` is true (e.g. from cron).
+    """
+    return await archive_status_logs(db, older_than_days)
 
 @router.get("/", response_model=List[JobResponse])
-def read_jobs(skip: int = 0, limit: int = 100, status: str = None, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
-    """Get all jobs with pagination. Optional filter by status."""
-    return get_all_jobs(db, skip=skip, limit=limit, status=status)
+async def read_jobs(
+    response: Response,
+    skip: int = 0,
+    limit: int = Query(100, ge=1, le=1000),
+    status: str = None,
+    city: str = None,
+    type: str = None,
+    date_from: date = None,
+    date_to: date = None,
+    cursor: str = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Get jobs ordered by delivery date. Optional filters: status, city, type, date_from/date_to.
+    Paginate by passing the X-Next-Cursor response header back as ?cursor= (skip still works but is slow on deep pages).
+    """
+    jobs = await get_all_jobs(
+        db, skip=skip, limit=limit, status=status, city=city, type=type,
+        date_from=date_from, date_to=date_to, cursor=cursor
+    )
+    if jobs and len(jobs) == limit:
+        response.headers["X-Next-Cursor"] = encode_job_cursor(jobs[-1])
+    return jobs
+
+RESYNC = '{"type": "resync"}'
+
+def _subscribe(last_event_id: str = None):
+    """Subscribe, then read the replay buffer, so nothing published in between is missed"""
+    sub = job_events.subscribe()
+    if sub is None:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many event stream clients")
+    backlog = [] if last_event_id is None else job_events.replay(last_event_id)
+    return sub, backlog
+
+async def _iter_events(sub, backlog):
+    """Yields events (None = must resync, "" = idle heartbeat); duplicates of the replay are skipped"""
+    last_seq = 0
+    if backlog is None:
+        yield None
+    else:
+        for event in backlog:
+            last_seq = event.seq
+            yield event
+    while True:
+        try:
+            event = await sub.get(settings.JOB_EVENTS_HEARTBEAT_SECONDS)
+        except asyncio.TimeoutError:
+            yield ""
+            continue
+        if event is None:
+            yield None
+            return
+        if event.seq > last_seq:
+            last_seq = event.seq
+            yield event
+
+@router.get("/events")
+async def stream_job_events(
+    last_event_id: str = None,
+    last_event_id_header: str = Header(None, alias="Last-Event-ID"),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Server-sent events for every job status change (create, start, pause, finish,
+    complete, update, delete, bulk). Pass Last-Event-ID (header or ?last_event_id=)
+    to replay what was missed while disconnected; an `event: resync` means the gap
+    was too long (or the client too slow) and GET /jobs should be re-read.
+    """
+    sub, backlog = _subscribe(last_event_id_header if last_event_id_header is not None else last_event_id)
+
+    async def stream():
+        try:
+            yield "retry: 3000\n\n"
+            async for event in _iter_events(sub, backlog):
+                if event is None:
+                    yield f"event: resync\ndata: {RESYNC}\n\n"
+                elif event == "":
+                    yield ": keepalive\n\n"
+                else:
+                    yield event.sse
+        finally:
+            job_events.unsubscribe(sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.websocket("/ws")
+async def job_events_websocket(websocket: WebSocket, token: str = None, last_event_id: str = None):
+    """
+    Same events as GET /jobs/events over a WebSocket, one JSON message each.
+    Authenticate with ?token= (browsers can't set headers on WebSockets) or a Bearer header.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if token is None and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if token is None or decode_token_subject(token) is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    try:
+        sub, backlog = _subscribe(last_event_id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+
+    await websocket.accept()
+    try:
+        async for event in _iter_events(sub, backlog):
+            if event is None:
+                await websocket.send_text(RESYNC)
+                await websocket.close()
+                return
+            await websocket.send_text('{"type": "keepalive"}' if event == "" else event.data)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        job_events.unsubscribe(sub)
 
 @router.get("/{job_id}", response_model=JobResponse)
-def read_job(job_id: int, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def read_job(job_id: int, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """Get a specific job by ID."""
-    return get_job_by_id(db, job_id)
+    return await get_job_by_id(db, job_id)
 
 @router.put("/{job_id}", response_model=JobResponse)
-def update_existing_job(job_id: int, job_update: JobUpdate, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def update_existing_job(job_id: int, job_update: JobUpdate, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """Update a job. Handles IP reassignment and validates is_assigned=False for new IPs."""
-    return update_job(db, job_id, job_update)
+    return await update_job(db, job_id, job_update)
 
 @router.delete("/{job_id}", status_code=status.HTTP_200_OK)
-def delete_existing_job(job_id: int, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def delete_existing_job(job_id: int, db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """Delete a job and unassign its IP."""
-    return delete_job(db, job_id)
+    return await delete_job(db, job_id)
 
 @router.post("/{job_id}/start", response_model=JobResponse)
-def start_existing_job(job_id: int, job_start: JobStart = JobStart(), db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def start_existing_job(job_id: int, job_start: JobStart = JobStart(), db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """Start or resume a job. Changes status to 'in_progress' and tracks job_start_date. Logs the action."""
-    return start_job(db, job_id, notes=job_start.notes)
+    return await start_job(db, job_id, notes=job_start.notes)
 
 @router.post("/{job_id}/pause", response_model=JobResponse)
-def pause_existing_job(job_id: int, job_pause: JobPause = JobPause(), db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def pause_existing_job(job_id: int, job_pause: JobPause = JobPause(), db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """Pause a job. Changes status to 'paused' and tracks paused_date. Logs the action with optional notes."""
-    return pause_job(db, job_id, notes=job_pause.notes)
+    return await pause_job(db, job_id, notes=job_pause.notes)
 
 @router.post("/{job_id}/finish", response_model=JobResponse)
-def finish_existing_job(job_id: int, job_finish: JobFinish = JobFinish(), db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
+async def finish_existing_job(job_id: int, job_finish: JobFinish = JobFinish(), db: AsyncSession = Depends(get_async_db), current_user: str = Depends(get_current_user)):
     """Finish a job. Changes status to 'completed' and tracks actual_delivery_date. Logs the action."""
-    return finish_job(db, job_id, notes=job_finish.notes)
+    return await finish_job(db, job_id, notes=job_finish.notes)
 
 @router.get("/{job_id}/history", response_model=List[JobStatusLogResponse])
-def get_job_history(job_id: int, db: Session = Depends(get_db), current_user: str = Depends(get_current_user)):
-    """Get complete status change history for a job, including all pauses and resumes."""
-    return get_job_status_history(db, job_id)
\ No newline at end of file
+async def get_job_history(
+    job_id: int,
+    response: Response,
+    since: datetime = None,
+    until: datetime = None,
+    cursor: str = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Page size; omit for the full history"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    Status change history for a job, including all pauses and resumes (archived entries too), oldest first.
+    Optional since/until time range. Returns the full history unless paged: pass limit (and then the
+    X-Next-Cursor response header back as ?cursor=) to read it a page at a time.
+    """
+    if cursor is not None and limit is None:
+        limit = 500
+    logs = await get_job_status_history(db, job_id, since=since, until=until, cursor=cursor, limit=limit)
+    if limit and logs and len(logs) == limit:
+        response.headers["X-Next-Cursor"] = encode_status_log_cursor(logs[-1])
+    return logs
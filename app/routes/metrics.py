@@ -0,0 +1,42 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import registry
+from app.core.db_pool import pool_stats
+from app.services.resilience import provider_stats
+from app.core.query_stats import route_query_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    """Everything below in Prometheus text format, for scraping"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@router.get("/pool")
+def get_pool_metrics():
+    """
+    Connection pool statistics per engine (sync / async).
+    checked_out and overflow show current load; checkout_wait_seconds is a
+    histogram of how long requests waited for a connection.
+    """
+    return pool_stats()
+
+
+@router.get("/providers")
+def get_provider_metrics():
+    """
+    Outbound provider health per upstream (Attestr, RML SMS): circuit state,
+    in-flight calls vs bulkhead limit, call/failure/retry/rejection counts and latency.
+    """
+    return provider_stats()
+
+
+@router.get("/queries")
+def get_query_metrics():
+    """
+    SQL statements per route: totals, average and max statements per request,
+    DB time, rows, requests flagged as N+1 and requests over their query budget.
+    """
+    return route_query_stats.snapshot()
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, field_serializer
 from typing import Optional, List
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 
 class JobStageCount(BaseModel):
@@ -42,4 +42,28 @@ class PayoutSummary(BaseModel):
         return float(value)
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+class JobDurationGroup(BaseModel):
+    group: Optional[str] = None  # IP id, city or job type
+    ip_name: Optional[str] = None
+    job_count: int
+    pause_count: int
+    active_seconds: float
+    paused_seconds: float
+    avg_active_seconds: float
+    avg_paused_seconds: float
+
+class JobDurationSummary(BaseModel):
+    group_by: str  # "ip", "city", "type"
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    groups: List[JobDurationGroup]
+
+class JobDuration(BaseModel):
+    job_id: int
+    status: str
+    active_seconds: float
+    paused_seconds: float
+    pause_count: int
+    first_started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
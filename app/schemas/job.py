@@ -1,6 +1,6 @@
 from pydantic import BaseModel, condecimal, Field
 from pydantic.types import Decimal
-from typing import Optional
+from typing import Optional, List, Literal
 from decimal import Decimal
 from datetime import date
 from typing import Optional
@@ -65,4 +65,30 @@ class JobResponse(BaseModel):
     status: str = 'created'
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class BulkJobRowError(BaseModel):
+    row: int            # 1-based position in the JSON array / CSV data rows
+    error: str
+
+class BulkJobCreateResponse(BaseModel):
+    created: int
+    job_ids: List[int]
+    errors: List[BulkJobRowError]
+
+class BulkJobTransition(BaseModel):
+    action: Literal["start", "pause", "finish"]
+    job_ids: List[int] = Field(..., min_length=1)
+    notes: Optional[str] = None
+
+class BulkJobTransitionResult(BaseModel):
+    job_id: int
+    ok: bool
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkJobTransitionResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkJobTransitionResult]
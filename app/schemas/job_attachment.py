@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+class JobAttachmentResponse(BaseModel):
+    id: int
+    job_id: int
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+    file_url: str
+    download_url: str
+    uploaded_by_ip_id: Optional[int] = None
+    uploaded_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+class PresignedUploadConfirm(BaseModel):
+    key: str
+    filename: Optional[str] = None
+
+class JobAttachmentPage(BaseModel):
+    job_id: int
+    attachments: List[JobAttachmentResponse]
+    next_cursor: Optional[str] = None
@@ -15,4 +15,9 @@ class JobStatusLogResponse(JobStatusLogBase):
     timestamp: datetime
     
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+class StatusLogArchiveResponse(BaseModel):
+    archived: int
+    batches: int
+    cutoff: datetime
+    remaining: bool
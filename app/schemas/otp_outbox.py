@@ -0,0 +1,11 @@
+from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+
+class OTPDispatchStatus(BaseModel):
+    dispatch_id: str
+    status: str
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    sent_at: Optional[datetime] = None
@@ -1,14 +1,54 @@
-import requests
+import asyncio
+import httpx
 from app.config import settings
+from app.services.http_client import get_http_client
+from app.services.resilience import attestr_provider, ProviderUnavailable
+from app.services.verification_cache import verification_key, get_cached_result, cache_result, ifsc_cache
+
+
+def _extract_ifsc_details(data: dict) -> dict | None:
+    """Branch metadata returned when fetchIfsc is requested"""
+    details = data.get('ifsc') or data.get('ifscDetails')
+    return details if isinstance(details, dict) else None
 
 
 class BankService:
     
     @staticmethod
-    def verify_bank_account(account_number: str, ifsc_code: str, fetch_ifsc: bool = False) -> dict:
+    async def verify_bank_account(account_number: str, ifsc_code: str, fetch_ifsc: bool = False) -> dict:
+        """
+        Verify a bank account, serving repeated (account, IFSC) lookups from the result
+        cache and branch metadata for an already-seen IFSC from the IFSC cache
+        """
+        key = verification_key("bank", account_number, ifsc_code)
+        ifsc = ifsc_code.upper()
+        ifsc_details = await ifsc_cache.get(ifsc) if fetch_ifsc else None
+        
+        result = await get_cached_result(key)
+        if result is None or (fetch_ifsc and ifsc_details is None):
+            # Only ask Attestr for branch metadata when it isn't cached yet
+            result = await BankService._verify_bank_account_uncached(
+                account_number, ifsc_code, fetch_ifsc and ifsc_details is None
+            )
+            await cache_result(key, result)
+            if result.get("ifsc_details"):
+                ifsc_details = result["ifsc_details"]
+                await ifsc_cache.set(ifsc, ifsc_details)
+        
+        if fetch_ifsc and ifsc_details:
+            result = {
+                **result,
+                "ifsc_details": ifsc_details,
+                "bank_name": ifsc_details.get('bank') or ifsc_details.get('bankName'),
+                "branch": ifsc_details.get('branch')
+            }
+        return result
+    
+    @staticmethod
+    async def _verify_bank_account_uncached(account_number: str, ifsc_code: str, fetch_ifsc: bool = False) -> dict:
         """Verify Bank Account using Attestr API"""
         try:
-            url = 'https://api.attestr.com/api/v2/public/finanx/acc'
+            url = '/api/v2/public/finanx/acc'
             
             headers = {
                 'Content-Type': 'application/json',
@@ -21,10 +61,14 @@ class BankService:
                 'fetchIfsc': fetch_ifsc
             }
             
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
+            client = get_http_client(settings.ATTESTR_BASE_URL)
             
-            data = response.json()
+            async def _post():
+                response = await client.post(url, json=payload, headers=headers)
+                response.raise_for_status()
+                return response.json()
+            
+            data = await attestr_provider.call(_post)
             
             print("data for bank details is:", data)
 
@@ -37,6 +81,7 @@ class BankService:
                     "ifsc_code": ifsc_code.upper(),
                     "account_holder_name": data.get('name'),
                     "account_status": data.get('status'),  # ACTIVE / INACTIVE etc.
+                    "ifsc_details": _extract_ifsc_details(data),
                     "message": "Bank account verified successfully",
                     "raw_response": data
                 }
@@ -50,7 +95,14 @@ class BankService:
                     "raw_response": data
                 }
             
-        except requests.exceptions.RequestException as e:
+        except (ProviderUnavailable, asyncio.TimeoutError) as e:
+            print("❌ Attestr unavailable:", str(e))
+            return {
+                "success": False,
+                "verified": False,
+                "message": "Verification service temporarily unavailable, please retry shortly"
+            }
+        except httpx.HTTPError as e:
             print("❌ Error verifying bank account:", str(e))
             return {
                 "success": False,
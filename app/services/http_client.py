@@ -0,0 +1,39 @@
+import httpx
+from app.config import settings
+
+try:
+    import h2  # noqa: F401  (HTTP/2 support is optional)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# One pooled client per upstream host, so each host gets its own connection limits
+_clients: dict = {}
+
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """Shared keep-alive client for an upstream host (created on first use)"""
+    client = _clients.get(base_url)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            base_url=base_url,
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(
+                settings.HTTP_READ_TIMEOUT,
+                connect=settings.HTTP_CONNECT_TIMEOUT
+            ),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            )
+        )
+        _clients[base_url] = client
+    return client
+
+
+async def close_http_clients():
+    """Close every pooled client (application shutdown)"""
+    for client in list(_clients.values()):
+        await client.aclose()
+    _clients.clear()
@@ -0,0 +1,61 @@
+"""
+Background refresh of job duration stats.
+
+Every JOB_DURATION_REFRESH_INTERVAL_SECONDS each worker runs the incremental
+`refresh_job_durations` in its own thread and session. The refresh takes the
+advisory lock without waiting, so when several workers are due at once one of
+them does the work and the rest skip that round.
+"""
+import threading
+
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.job_duration import refresh_job_durations
+
+
+class JobDurationRefresher:
+
+    def __init__(
+        self,
+        interval_seconds: float = settings.JOB_DURATION_REFRESH_INTERVAL_SECONDS,
+        session_factory=SessionLocal
+    ):
+        self.interval_seconds = interval_seconds
+        self.session_factory = session_factory
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the refresh loop (idempotent; no-op when the interval is 0)"""
+        with self._lock:
+            if self._thread is not None or self.interval_seconds <= 0:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="job-duration-refresher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_once()
+            self._stop.wait(self.interval_seconds)
+
+    def refresh_once(self) -> dict:
+        db = self.session_factory()
+        try:
+            return refresh_job_durations(db, wait=False)
+        except Exception as e:
+            print("❌ Job duration refresh failed:", getattr(e, "detail", str(e)))
+            return {"jobs_refreshed": 0}
+        finally:
+            db.close()
+
+
+job_duration_refresher = JobDurationRefresher()
@@ -0,0 +1,180 @@
+"""
+Background OTP SMS delivery.
+
+Login stores the OTP, writes an `otp_outbox` row and returns; a small worker
+pool sends the SMS. Sends are driven from the table, not from memory: a poller
+picks up rows that are due (new, retrying with backoff, or left mid-send by a
+crashed process), and each worker claims its row with a conditional UPDATE so
+a send is never attempted by two workers/processes at once.
+
+Requesting a new OTP supersedes the phone's earlier unsent rows: their codes
+are no longer valid, so they are cancelled (and their codes cleared) rather
+than delivered.
+"""
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.model.otp_outbox import OtpOutbox
+from app.services.otp_service import OTPService
+
+# Rows in these states are picked up once next_attempt_at has passed
+DUE_STATUSES = ("pending", "sending")
+
+
+class OTPDispatcher:
+
+    def __init__(
+        self,
+        workers: int = settings.OTP_DISPATCH_WORKERS,
+        max_attempts: int = settings.OTP_DISPATCH_MAX_ATTEMPTS,
+        poll_seconds: float = settings.OTP_DISPATCH_POLL_SECONDS,
+        lease_seconds: float = settings.OTP_DISPATCH_LEASE_SECONDS,
+        backoff_seconds: float = settings.OTP_DISPATCH_RETRY_BACKOFF_SECONDS,
+        session_factory=SessionLocal
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.backoff_seconds = backoff_seconds
+        self.session_factory = session_factory
+        self._executor = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start the worker pool and the outbox poller (idempotent)"""
+        with self._lock:
+            if self._executor is not None:
+                return
+            self._stop.clear()
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="otp-dispatch")
+            threading.Thread(target=self._poll_loop, name="otp-dispatch-poller", daemon=True).start()
+
+    def stop(self):
+        """Stop polling and finish in-flight sends; queued rows stay in the outbox"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._stop.set()
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def enqueue(self, db: Session, phone_number: str, recipient_name: str, otp_code: str) -> str:
+        """
+        Persist a send (commits the caller's session) and hand it to a worker;
+        returns the row's dispatch token for GET /auth/otp-status
+        """
+        db.execute(
+            update(OtpOutbox)
+            .where(OtpOutbox.phone_number == phone_number, OtpOutbox.status.in_(DUE_STATUSES))
+            .values(status="superseded", otp_code=None),
+            execution_options={"synchronize_session": False}
+        )
+        row = OtpOutbox(
+            phone_number=phone_number,
+            recipient_name=recipient_name,
+            otp_code=str(otp_code),
+            status="pending"
+        )
+        db.add(row)
+        db.flush()
+        outbox_id, dispatch_token = row.id, row.dispatch_token
+        db.commit()
+        self.submit(outbox_id)
+        return dispatch_token
+
+    def submit(self, outbox_id: int):
+        self.start()
+        executor = self._executor
+        if executor is not None:
+            # If stopped meanwhile the row stays pending and the next process picks it up
+            executor.submit(self._dispatch, outbox_id)
+
+    def _poll_loop(self):
+        while not self._stop.is_set():
+            try:
+                for outbox_id in self._due_ids():
+                    self.submit(outbox_id)
+            except Exception as e:
+                print("❌ OTP outbox poll failed:", str(e))
+            self._stop.wait(self.poll_seconds)
+
+    def _due_ids(self, limit: int = 100) -> list:
+        db = self.session_factory()
+        try:
+            return db.execute(
+                select(OtpOutbox.id)
+                .where(
+                    OtpOutbox.status.in_(DUE_STATUSES),
+                    OtpOutbox.next_attempt_at <= datetime.utcnow()
+                )
+                .order_by(OtpOutbox.next_attempt_at)
+                .limit(limit)
+            ).scalars().all()
+        finally:
+            db.close()
+
+    def _claim(self, db: Session, outbox_id: int) -> bool:
+        """Take a lease on the row; False if another worker has it or it is finished"""
+        now = datetime.utcnow()
+        result = db.execute(
+            update(OtpOutbox)
+            .where(
+                OtpOutbox.id == outbox_id,
+                OtpOutbox.status.in_(DUE_STATUSES),
+                OtpOutbox.next_attempt_at <= now
+            )
+            .values(
+                status="sending",
+                attempts=OtpOutbox.attempts + 1,
+                next_attempt_at=now + timedelta(seconds=self.lease_seconds)
+            )
+        )
+        db.commit()
+        return result.rowcount == 1
+
+    def _retry_delay(self, attempts: int) -> float:
+        # Exponential backoff with full jitter, capped at 5 minutes
+        return random.uniform(0, min(self.backoff_seconds * (2 ** attempts), 300))
+
+    def _dispatch(self, outbox_id: int):
+        db = self.session_factory()
+        try:
+            if not self._claim(db, outbox_id):
+                return
+
+            row = db.get(OtpOutbox, outbox_id)
+            now = datetime.utcnow()
+
+            if row.created_at < now - timedelta(minutes=settings.OTP_EXPIRY_MINUTES):
+                row.status = "failed"
+                row.last_error = "OTP expired before it could be delivered"
+            elif OTPService.send_sms(row.phone_number, row.recipient_name, row.otp_code):
+                row.status = "sent"
+                row.sent_at = datetime.utcnow()
+            elif row.attempts >= self.max_attempts:
+                row.status = "failed"
+                row.last_error = f"SMS gateway failed {row.attempts} time(s)"
+            else:
+                row.status = "pending"
+                row.last_error = "SMS gateway rejected or unreachable"
+                row.next_attempt_at = now + timedelta(seconds=self._retry_delay(row.attempts))
+
+            if row.status in ("sent", "failed"):
+                row.otp_code = None
+            db.commit()
+        except Exception as e:
+            # Lease expires and the poller retries the row
+            db.rollback()
+            print(f"❌ OTP dispatch {outbox_id} failed:", str(e))
+        finally:
+            db.close()
+
+
+otp_dispatcher = OTPDispatcher()
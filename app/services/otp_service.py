@@ -10,6 +10,8 @@ from sqlalchemy.orm import Session
 from app.config import settings
 from app.utils.helpers import generate_otp, capitalize_first_name
 from app.model.ip import ip  # adjust path
+from app.services.resilience import rml_sms_provider, ProviderUnavailable
+from app.services.otp_store import get_otp_store
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -17,46 +19,17 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 class OTPService:
 
     @staticmethod
-    def generate_and_store_otp(db: Session, phone_number: str) -> str:
-        """Generate OTP and store plain OTP in DB with expiry"""
+    def generate_and_store_otp(db: Session, user: ip) -> str:
+        """Generate OTP and keep it in the OTP store until it expires or is used (caller commits)"""
         otp = generate_otp(settings.OTP_LENGTH)
-
-        expiry_time = datetime.utcnow() + timedelta(minutes=settings.OTP_EXPIRY_MINUTES)
-
-        user = db.query(ip).filter(ip.phone_number == phone_number).first()
-
-        if not user:
-            raise Exception("User not found")
-
-        user.otp = str(otp)            # store raw OTP
-        user.otp_expiry = expiry_time
-        db.commit()
-
+        get_otp_store().put(db, user.phone_number, str(otp), settings.OTP_EXPIRY_MINUTES * 60)
         return otp
 
 
     @staticmethod
-    def verify_otp(db: Session, phone_number: str, otp: str) -> bool:
-        """Check OTP stored in DB"""
-        user = db.query(ip).filter(ip.phone_number == phone_number).first()
-
-        if not user or not user.otp:
-            return False
-        
-        # Check expiry
-        if user.otp_expiry < datetime.utcnow():
-            return False
-
-        # Compare OTP directly
-        if str(user.otp) != str(otp).strip():
-            return False
-
-        # OTP valid, wipe fields
-        user.otp = None
-        user.otp_expiry = None
-        db.commit()
-
-        return True
+    def verify_otp(db: Session, user: ip, otp: str) -> bool:
+        """Check the OTP and consume it, so each code can be used only once (caller commits)"""
+        return get_otp_store().verify_and_consume(db, user.phone_number, otp)
 
 
 
@@ -87,23 +60,39 @@ class OTPService:
 
             print("Sending SMS to:", formatted_number)
             print("otp isss ", otp_code)
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+
+            def _get(timeout: float):
+                # Never wait past the provider deadline, so a retry can't overrun it
+                response = requests.get(url, timeout=min(10, timeout))
+                response.raise_for_status()
+                return response
+
+            response = rml_sms_provider.call_sync(_get)
 
             print(f"✅ OTP sent successfully to {formatted_number}: {response.text}")
             return True
 
+        except ProviderUnavailable as e:
+            print("❌ SMS provider unavailable:", str(e))
+            return False
         except requests.exceptions.RequestException as e:
             print("❌ Error sending SMS:", str(e))
             return False
 
     @staticmethod
-    def send_otp(db: Session, phone_number: str, user_name: str = "ip") -> dict:
-        otp = OTPService.generate_and_store_otp(db, phone_number)
-        sms_sent = OTPService.send_sms(phone_number, user_name, otp)
+    def send_otp(db: Session, user: ip) -> dict:
+        """
+        Store a fresh OTP for an already-loaded user and queue its SMS; delivery
+        happens in the background dispatcher. Commits once (the OTP and the outbox row).
+        """
+        from app.services.otp_dispatcher import otp_dispatcher
+
+        first_name = user.first_name.split()[0] if user.first_name else "User"
+        otp = OTPService.generate_and_store_otp(db, user)
+        dispatch_token = otp_dispatcher.enqueue(db, user.phone_number, first_name, otp)
 
         return {
-            "success": sms_sent,
-            "message": "OTP sent successfully" if sms_sent else "Failed to send OTP",
-            "otp": otp if not sms_sent else None
+            "success": True,
+            "message": "OTP queued for delivery",
+            "dispatch_id": dispatch_token
         }
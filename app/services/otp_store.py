@@ -0,0 +1,141 @@
+"""
+Where pending login OTPs live, kept off the `ip` table so login traffic doesn't
+write to the rows job assignment updates. The store must be shared by every
+worker (login and verify-otp can land on different ones) and survive restarts,
+so the default is the database; Redis is used when configured, and the
+per-process memory store only when explicitly chosen.
+
+Codes are stored as an HMAC (keyed with SECRET_KEY), never in plain text, and
+verification consumes the code atomically: two concurrent verify calls with
+the right code can't both succeed.
+
+Every method takes the request's Session. The database store writes through
+it without committing, so the OTP change is part of the request's single
+commit (and a failed commit leaves the code unconsumed); the other stores
+ignore it.
+"""
+import hashlib
+import hmac
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.cache import TTLCache
+from app.core.redis_client import get_sync_redis
+from app.crud.rollup import UPSERT_INSERTS
+from app.model.otp_code import OtpCode
+
+
+def _digest(phone_number: str, otp: str) -> str:
+    message = f"{phone_number}:{str(otp).strip()}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+
+class InMemoryOTPStore:
+    """Per-process store; only for a single worker or local development (OTP_STORE_BACKEND=memory)"""
+
+    def __init__(self, max_size: int = settings.OTP_STORE_MAX_SIZE):
+        self._codes = TTLCache(max_size, settings.OTP_EXPIRY_MINUTES * 60)
+        self._lock = threading.Lock()
+
+    def put(self, db: Session, phone_number: str, otp: str, ttl_seconds: int):
+        """Store a new code for the phone, replacing any earlier one"""
+        self._codes.set(phone_number, _digest(phone_number, otp), ttl_seconds)
+
+    def verify_and_consume(self, db: Session, phone_number: str, otp: str) -> bool:
+        with self._lock:
+            stored = self._codes.get(phone_number)
+            if stored is None or not hmac.compare_digest(stored, _digest(phone_number, otp)):
+                return False
+            self._codes.delete(phone_number)
+            return True
+
+
+# Delete the key only if it still holds the submitted code
+_COMPARE_AND_DELETE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+
+class RedisOTPStore:
+    """Shared store for multi-worker deployments; expiry is handled by Redis"""
+
+    def __init__(self, client, namespace: str = "otp"):
+        self.client = client
+        self.namespace = namespace
+        self._compare_and_delete = client.register_script(_COMPARE_AND_DELETE)
+
+    def _key(self, phone_number: str) -> str:
+        return f"{self.namespace}:{phone_number}"
+
+    def put(self, db: Session, phone_number: str, otp: str, ttl_seconds: int):
+        self.client.set(self._key(phone_number), _digest(phone_number, otp), ex=int(ttl_seconds))
+
+    def verify_and_consume(self, db: Session, phone_number: str, otp: str) -> bool:
+        return self._compare_and_delete(
+            keys=[self._key(phone_number)],
+            args=[_digest(phone_number, otp)]
+        ) == 1
+
+
+class DatabaseOTPStore:
+    """
+    Shared store in the otp_code table; works with any number of workers without
+    Redis. Changes join the caller's transaction and are committed by the caller.
+    """
+
+    def put(self, db: Session, phone_number: str, otp: str, ttl_seconds: int):
+        now = datetime.utcnow()
+        values = {
+            "phone_number": phone_number,
+            "code_digest": _digest(phone_number, otp),
+            "expires_at": now + timedelta(seconds=ttl_seconds),
+            "created_at": now,
+        }
+        statement = UPSERT_INSERTS[db.get_bind().dialect.name](OtpCode).values(**values)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["phone_number"],
+            set_={key: value for key, value in values.items() if key != "phone_number"}
+        ))
+
+    def verify_and_consume(self, db: Session, phone_number: str, otp: str) -> bool:
+        # Single conditional DELETE: only one of several concurrent verifies removes the row
+        result = db.execute(
+            delete(OtpCode).where(
+                OtpCode.phone_number == phone_number,
+                OtpCode.code_digest == _digest(phone_number, otp),
+                OtpCode.expires_at > datetime.utcnow()
+            ),
+            execution_options={"synchronize_session": False}
+        )
+        return result.rowcount == 1
+
+
+_store = None
+
+
+def get_otp_store():
+    """
+    OTP_STORE_BACKEND: database, redis, memory, or auto (redis when REDIS_URL is
+    set, otherwise database). Never falls back to the per-process memory store.
+    """
+    global _store
+    if _store is None:
+        backend = settings.OTP_STORE_BACKEND
+        if backend not in ("auto", "database", "redis", "memory"):
+            raise RuntimeError(f"Unknown OTP_STORE_BACKEND: {backend}")
+        client = get_sync_redis() if backend in ("auto", "redis") else None
+        if backend == "redis" and client is None:
+            raise RuntimeError("OTP_STORE_BACKEND=redis requires REDIS_URL")
+        if client is not None:
+            _store = RedisOTPStore(client)
+        elif backend == "memory":
+            _store = InMemoryOTPStore()
+        else:
+            _store = DatabaseOTPStore()
+    return _store
@@ -1,14 +1,30 @@
-import requests
+import asyncio
+import httpx
 from app.config import settings
+from app.services.http_client import get_http_client
+from app.services.resilience import attestr_provider, ProviderUnavailable
+from app.services.verification_cache import verification_key, get_cached_result, cache_result
 
 
 class PANService:
     
     @staticmethod
-    def verify_pan(pan_number: str) -> dict:
+    async def verify_pan(pan_number: str) -> dict:
+        """Verify PAN, serving repeated lookups of the same PAN from the result cache"""
+        key = verification_key("pan", pan_number)
+        cached = await get_cached_result(key)
+        if cached is not None:
+            return cached
+        
+        result = await PANService._verify_pan_uncached(pan_number)
+        await cache_result(key, result)
+        return result
+    
+    @staticmethod
+    async def _verify_pan_uncached(pan_number: str) -> dict:
         """Verify PAN using Attestr API"""
         try:
-            url = 'https://api.attestr.com/api/v2/public/checkx/pan'
+            url = '/api/v2/public/checkx/pan'
             
             headers = {
                 'Content-Type': 'application/json',
@@ -19,10 +35,14 @@ class PANService:
                 'pan': pan_number.upper()
             }
             
-            response = requests.post(url, json=payload, headers=headers, timeout=30)
-            response.raise_for_status()
+            client = get_http_client(settings.ATTESTR_BASE_URL)
             
-            data = response.json()
+            async def _post():
+                response = await client.post(url, json=payload, headers=headers)
+                response.raise_for_status()
+                return response.json()
+            
+            data = await attestr_provider.call(_post)
             print("data for pan details is:",data)
             
             # Check if verification was successful
@@ -45,7 +65,14 @@ class PANService:
                     "raw_response": data
                 }
             
-        except requests.exceptions.RequestException as e:
+        except (ProviderUnavailable, asyncio.TimeoutError) as e:
+            print("❌ Attestr unavailable:", str(e))
+            return {
+                "success": False,
+                "verified": False,
+                "message": "Verification service temporarily unavailable, please retry shortly"
+            }
+        except httpx.HTTPError as e:
             print("❌ Error verifying PAN:", str(e))
             return {
                 "success": False,
@@ -0,0 +1,276 @@
+import asyncio
+import random
+import threading
+import time
+from app.config import settings
+from app.core.metrics import registry, outbound_request_duration, outbound_requests
+
+
+outbound_retries = registry.counter("outbound_retries_total", "Retried calls to external providers", ("provider",))
+outbound_rejected = registry.counter(
+    "outbound_rejected_total", "Calls failed fast by the bulkhead or open circuit", ("provider",)
+)
+
+
+class ProviderUnavailable(Exception):
+    """Raised without calling the provider: circuit open, bulkhead full or deadline spent"""
+
+    def __init__(self, provider: str, reason: str):
+        super().__init__(f"{provider} unavailable: {reason}")
+        self.provider = provider
+        self.reason = reason
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half_open after `reset_timeout` seconds, letting a single probe through;
+    half_open -> closed on probe success, back to open on probe failure.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Free the half-open probe slot without a verdict (the attempt was cancelled)"""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class ResilientProvider:
+    """
+    Wraps calls to one outbound provider with a fail-fast concurrency bulkhead,
+    a circuit breaker and jittered retries bounded by an overall deadline.
+
+    is_failure(exc) decides whether an exception counts against the provider
+    (timeouts, 5xx) or is the caller's problem (4xx) and is re-raised untouched.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        deadline_seconds: float,
+        max_attempts: int = settings.PROVIDER_RETRY_MAX_ATTEMPTS,
+        backoff_base_seconds: float = settings.PROVIDER_RETRY_BACKOFF_SECONDS,
+        failure_threshold: int = settings.PROVIDER_BREAKER_FAILURE_THRESHOLD,
+        reset_timeout_seconds: float = settings.PROVIDER_BREAKER_RESET_SECONDS,
+        is_failure=lambda exc: True
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.deadline_seconds = deadline_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base_seconds = backoff_base_seconds
+        self.is_failure = is_failure
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout_seconds)
+
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+        self.latency = outbound_request_duration.labels(provider=name)
+        self.successes = outbound_requests.labels(provider=name, outcome="success")
+        self.failures = outbound_requests.labels(provider=name, outcome="failure")
+        self.client_errors = outbound_requests.labels(provider=name, outcome="client_error")
+        self.retries = outbound_retries.labels(provider=name)
+        self.rejected = outbound_rejected.labels(provider=name)
+
+    # Bulkhead ---------------------------------------------------------------
+
+    def _enter(self):
+        with self._lock:
+            if self._in_flight >= self.max_concurrency:
+                self.rejected.inc()
+                raise ProviderUnavailable(self.name, "too many concurrent calls")
+            self._in_flight += 1
+
+    def _exit(self):
+        with self._lock:
+            self._in_flight -= 1
+
+    # Attempt bookkeeping ----------------------------------------------------
+
+    def _before_attempt(self):
+        if not self.breaker.allow():
+            self.rejected.inc()
+            raise ProviderUnavailable(self.name, "circuit open")
+
+    def _after_attempt(self, started: float, exc: Exception = None) -> bool:
+        """Record the attempt; returns True if it failed in a way worth retrying"""
+        self.latency.observe(time.perf_counter() - started)
+        if exc is None:
+            self.successes.inc()
+            self.breaker.record_success()
+            return False
+        if not self.is_failure(exc):
+            # Caller error: the provider is healthy, don't retry
+            self.client_errors.inc()
+            self.breaker.record_success()
+            return False
+        self.failures.inc()
+        self.breaker.record_failure()
+        return True
+
+    def _backoff(self, attempt: int, remaining: float) -> float:
+        # Full jitter, never sleeping past the deadline
+        return min(random.uniform(0, self.backoff_base_seconds * (2 ** attempt)), max(remaining, 0))
+
+    # Calls ------------------------------------------------------------------
+
+    async def call(self, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) through the bulkhead, breaker and retry policy"""
+        self._enter()
+        try:
+            deadline = time.monotonic() + self.deadline_seconds
+            for attempt in range(self.max_attempts):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ProviderUnavailable(self.name, "deadline exceeded")
+                self._before_attempt()
+                started = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(fn(*args, **kwargs), timeout=remaining)
+                except Exception as exc:
+                    retry = self._after_attempt(started, exc)
+                    if not retry or attempt == self.max_attempts - 1:
+                        raise
+                    self.retries.inc()
+                    await asyncio.sleep(self._backoff(attempt, deadline - time.monotonic()))
+                    continue
+                except BaseException:
+                    # Cancelled (CancelledError isn't an Exception): no outcome to record,
+                    # but a half-open probe must not stay claimed forever
+                    self.breaker.release_probe()
+                    raise
+                self._after_attempt(started)
+                return result
+            raise ProviderUnavailable(self.name, "deadline exceeded")
+        finally:
+            self._exit()
+
+    def call_sync(self, fn, *args, **kwargs):
+        """
+        Blocking variant for sync call sites. fn is called with timeout=<seconds left
+        before the deadline> and must use it as its request timeout, since a blocking
+        call can't be interrupted from here.
+        """
+        self._enter()
+        try:
+            deadline = time.monotonic() + self.deadline_seconds
+            for attempt in range(self.max_attempts):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise ProviderUnavailable(self.name, "deadline exceeded")
+                self._before_attempt()
+                started = time.perf_counter()
+                try:
+                    result = fn(*args, timeout=remaining, **kwargs)
+                except Exception as exc:
+                    retry = self._after_attempt(started, exc)
+                    if not retry or attempt == self.max_attempts - 1:
+                        raise
+                    self.retries.inc()
+                    time.sleep(self._backoff(attempt, deadline - time.monotonic()))
+                    continue
+                except BaseException:
+                    self.breaker.release_probe()
+                    raise
+                self._after_attempt(started)
+                return result
+            raise ProviderUnavailable(self.name, "deadline exceeded")
+        finally:
+            self._exit()
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "calls": self.successes.value + self.failures.value + self.client_errors.value,
+            "successes": self.successes.value,
+            "failures": self.failures.value,
+            "retries": self.retries.value,
+            "rejected": self.rejected.value,
+            "latency_seconds": self.latency.snapshot(),
+        }
+
+
+def _is_server_side_failure(exc: Exception) -> bool:
+    """Timeouts, connection errors, 429 and 5xx count against the provider; other 4xx don't"""
+    response = getattr(exc, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code is None:
+        return True
+    return status_code == 429 or status_code >= 500
+
+
+attestr_provider = ResilientProvider(
+    "attestr",
+    max_concurrency=settings.ATTESTR_MAX_CONCURRENCY,
+    deadline_seconds=settings.ATTESTR_DEADLINE_SECONDS,
+    is_failure=_is_server_side_failure
+)
+
+rml_sms_provider = ResilientProvider(
+    "rml_sms",
+    max_concurrency=settings.SMS_MAX_CONCURRENCY,
+    deadline_seconds=settings.SMS_DEADLINE_SECONDS,
+    is_failure=_is_server_side_failure
+)
+
+PROVIDERS = {provider.name: provider for provider in (attestr_provider, rml_sms_provider)}
+
+
+def provider_stats() -> dict:
+    return {name: provider.snapshot() for name, provider in PROVIDERS.items()}
+
+
+def _collect_provider_state() -> list:
+    samples = [
+        ("outbound_circuit_open", {"provider": name}, provider.breaker.state != CircuitBreaker.CLOSED)
+        for name, provider in PROVIDERS.items()
+    ]
+    in_flight = [("outbound_in_flight", {"provider": name}, provider._in_flight) for name, provider in PROVIDERS.items()]
+    return [
+        ("outbound_circuit_open", "gauge", "1 while the provider's circuit breaker is open or half-open", samples),
+        ("outbound_in_flight", "gauge", "Calls currently holding a bulkhead slot", in_flight),
+    ]
+
+
+registry.register_collector(_collect_provider_state)
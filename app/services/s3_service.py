@@ -1,19 +1,76 @@
+import asyncio
+import time
 import boto3, uuid, os
+import anyio
+from botocore.config import Config
+from botocore.exceptions import ClientError
 from dotenv import load_dotenv
+from app.core.cache import TTLCache
+from app.core.metrics import outbound_request_duration, outbound_requests
 load_dotenv()
 
 AWS_S3_BUCKET = os.getenv("AWS_S3_BUCKET")
 AWS_REGION = os.getenv("AWS_REGION")
+# Optional S3-compatible endpoint (MinIO / LocalStack) for local runs
+AWS_S3_ENDPOINT_URL = os.getenv("AWS_S3_ENDPOINT_URL") or None
+
+# Part size for streamed uploads; S3 requires >= 5 MiB for every part but the last
+S3_PART_SIZE = max(int(os.getenv("S3_PART_SIZE", 8 * 1024 * 1024)), 5 * 1024 * 1024)
+# Max concurrent boto3 calls per worker, and parts in flight per upload
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", 8))
+S3_PARTS_IN_FLIGHT = int(os.getenv("S3_PARTS_IN_FLIGHT", 4))
+S3_PRESIGNED_URL_EXPIRY = int(os.getenv("S3_PRESIGNED_URL_EXPIRY", 900))
 
 s3_client = boto3.client(
     "s3",
     aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
     aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=AWS_REGION
+    region_name=AWS_REGION,
+    endpoint_url=AWS_S3_ENDPOINT_URL,
+    config=Config(max_pool_connections=S3_MAX_CONCURRENCY)
 )
 
+_s3_limiter = None
+
+# Presigned GET URLs by object key; reused for half their lifetime so clients
+# always receive a URL with at least half of S3_PRESIGNED_URL_EXPIRY left
+_download_url_cache = TTLCache(max_size=50000, ttl_seconds=S3_PRESIGNED_URL_EXPIRY / 2)
+
+
+def _limiter() -> anyio.CapacityLimiter:
+    # Created lazily: anyio limiters need a running event loop
+    global _s3_limiter
+    if _s3_limiter is None:
+        _s3_limiter = anyio.CapacityLimiter(S3_MAX_CONCURRENCY)
+    return _s3_limiter
+
+
+async def _run_s3(fn, **kwargs):
+    """Run a blocking boto3 call in a worker thread, bounded by S3_MAX_CONCURRENCY"""
+    start = time.perf_counter()
+    try:
+        result = await anyio.to_thread.run_sync(lambda: fn(**kwargs), limiter=_limiter())
+    except Exception:
+        outbound_requests.labels(provider="s3", outcome="failure").inc()
+        raise
+    finally:
+        outbound_request_duration.labels(provider="s3").observe(time.perf_counter() - start)
+    outbound_requests.labels(provider="s3", outcome="success").inc()
+    return result
+
+
+def build_object_key(filename: str, prefix: str = "") -> str:
+    return f"{prefix}{uuid.uuid4()}_{filename}"
+
+
+def get_file_url(key: str) -> str:
+    if AWS_S3_ENDPOINT_URL:
+        return f"{AWS_S3_ENDPOINT_URL.rstrip('/')}/{AWS_S3_BUCKET}/{key}"
+    return f"https://{AWS_S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{key}"
+
+
 def upload_file_to_s3(file_content, filename, content_type):
-    unique_filename = f"{uuid.uuid4()}_{filename}"
+    unique_filename = build_object_key(filename)
 
     s3_client.put_object(
         Bucket=AWS_S3_BUCKET,
@@ -23,5 +80,120 @@ def upload_file_to_s3(file_content, filename, content_type):
         
     )
 
-    file_url = f"https://{AWS_S3_BUCKET}.s3.{AWS_REGION}.amazonaws.com/{unique_filename}"
+    file_url = get_file_url(unique_filename)
     return file_url
+
+
+async def upload_stream_to_s3(upload) -> dict:
+    """
+    Upload a FastAPI UploadFile without holding it in memory.
+    Files smaller than one part go up with a single PUT; larger ones use a
+    multipart upload with at most S3_PARTS_IN_FLIGHT parts buffered at a time.
+    """
+    key = build_object_key(upload.filename)
+    content_type = upload.content_type or "application/octet-stream"
+
+    chunk = await upload.read(S3_PART_SIZE)
+    if len(chunk) < S3_PART_SIZE:
+        await _run_s3(s3_client.put_object, Bucket=AWS_S3_BUCKET, Key=key, Body=chunk, ContentType=content_type)
+        return {"key": key, "file_url": get_file_url(key), "size": len(chunk)}
+
+    multipart = await _run_s3(
+        s3_client.create_multipart_upload, Bucket=AWS_S3_BUCKET, Key=key, ContentType=content_type
+    )
+    upload_id = multipart["UploadId"]
+
+    async def upload_part(part_number: int, body: bytes):
+        part = await _run_s3(
+            s3_client.upload_part,
+            Bucket=AWS_S3_BUCKET, Key=key, UploadId=upload_id, PartNumber=part_number, Body=body
+        )
+        return {"PartNumber": part_number, "ETag": part["ETag"]}
+
+    size = 0
+    part_number = 0
+    in_flight = set()
+    parts = []
+    try:
+        while chunk:
+            part_number += 1
+            size += len(chunk)
+            in_flight.add(asyncio.create_task(upload_part(part_number, chunk)))
+            if len(in_flight) >= S3_PARTS_IN_FLIGHT:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                parts.extend(task.result() for task in done)
+            chunk = await upload.read(S3_PART_SIZE)
+
+        parts.extend(await asyncio.gather(*in_flight))
+        in_flight = set()
+
+        await _run_s3(
+            s3_client.complete_multipart_upload,
+            Bucket=AWS_S3_BUCKET, Key=key, UploadId=upload_id,
+            MultipartUpload={"Parts": sorted(parts, key=lambda part: part["PartNumber"])}
+        )
+    except BaseException:
+        for task in in_flight:
+            task.cancel()
+        await _run_s3(s3_client.abort_multipart_upload, Bucket=AWS_S3_BUCKET, Key=key, UploadId=upload_id)
+        raise
+
+    return {"key": key, "file_url": get_file_url(key), "size": size}
+
+
+def generate_presigned_upload(filename: str, content_type: str, prefix: str = "") -> dict:
+    """Presigned PUT so clients can upload straight to S3 without going through the API"""
+    key = build_object_key(filename, prefix)
+    upload_url = s3_client.generate_presigned_url(
+        "put_object",
+        Params={"Bucket": AWS_S3_BUCKET, "Key": key, "ContentType": content_type},
+        ExpiresIn=S3_PRESIGNED_URL_EXPIRY
+    )
+    return {
+        "key": key,
+        "upload_url": upload_url,
+        "file_url": get_file_url(key),
+        "method": "PUT",
+        "headers": {"Content-Type": content_type},
+        "expires_in": S3_PRESIGNED_URL_EXPIRY
+    }
+
+
+async def head_s3_object(key: str) -> dict | None:
+    """Size and content type of an uploaded object, or None if it doesn't exist"""
+    try:
+        head = await _run_s3(s3_client.head_object, Bucket=AWS_S3_BUCKET, Key=key)
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+            return None
+        raise
+    return {"size": head.get("ContentLength"), "content_type": head.get("ContentType")}
+
+
+async def delete_s3_objects(keys: list):
+    """Best-effort cleanup of objects that will never be recorded (logged, never raised)"""
+    if not keys:
+        return
+    try:
+        await _run_s3(
+            s3_client.delete_objects,
+            Bucket=AWS_S3_BUCKET, Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+        )
+    except Exception as e:
+        print(f"❌ Failed to delete orphaned S3 objects {keys}:", str(e))
+
+
+def get_presigned_download_urls(keys) -> dict:
+    """Presigned GET URLs for many objects at once (signed locally, cached per key)"""
+    urls = {}
+    for key in keys:
+        url = _download_url_cache.get(key)
+        if url is None:
+            url = s3_client.generate_presigned_url(
+                "get_object",
+                Params={"Bucket": AWS_S3_BUCKET, "Key": key},
+                ExpiresIn=S3_PRESIGNED_URL_EXPIRY
+            )
+            _download_url_cache.set(key, url)
+        urls[key] = url
+    return urls
@@ -0,0 +1,45 @@
+import hashlib
+import hmac
+from app.config import settings
+from app.core.cache import TieredCache
+
+# Attestr verification results (PAN, bank account) and IFSC branch metadata
+verification_cache = TieredCache(
+    "verification",
+    settings.VERIFICATION_CACHE_MAX_SIZE,
+    settings.VERIFICATION_CACHE_POSITIVE_TTL_SECONDS
+)
+ifsc_cache = TieredCache(
+    "ifsc",
+    settings.VERIFICATION_CACHE_MAX_SIZE,
+    settings.IFSC_CACHE_TTL_SECONDS
+)
+
+
+def verification_key(*parts: str) -> str:
+    """Keyed hash of the inputs, so PAN / account numbers never appear in cache keys"""
+    message = "|".join(part.strip().upper() for part in parts)
+    return hmac.new(settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+
+def is_cacheable(result: dict) -> bool:
+    """Only answers from Attestr are cached - transport / unexpected errors are retried"""
+    return "raw_response" in result
+
+
+async def get_cached_result(key: str):
+    return await verification_cache.get(key)
+
+
+async def cache_result(key: str, result: dict):
+    if not is_cacheable(result):
+        return
+    ttl = (
+        settings.VERIFICATION_CACHE_POSITIVE_TTL_SECONDS
+        if result.get("verified")
+        else settings.VERIFICATION_CACHE_NEGATIVE_TTL_SECONDS
+    )
+    # raw_response carries the full provider payload; only the fields routes use are kept
+    cached = {k: v for k, v in result.items() if k != "raw_response"}
+    cached["cached"] = True
+    await verification_cache.set(key, cached, ttl)